@@ -0,0 +1,151 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+import datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+from xmltv_index import DEFAULT_EPG, iter_xmltv
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="none" generator-info-url="none">\n'
+FOOTER = "</tv>\n"
+
+# ---------- Channel definitions ----------
+def load_channel_specs(path: str) -> List[Dict]:
+    """Channels (id, name, icon) plus the title/desc their placeholder programmes use,
+    read from an existing guide (.xml or .xml.gz)."""
+    specs: Dict[str, Dict] = {}
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for kind, item in iter_xmltv(f):
+            if kind == "channel":
+                specs[item["id"]] = dict(item, title=None, desc=None)
+            elif item["channel"] in specs and specs[item["channel"]]["title"] is None:
+                specs[item["channel"]].update(title=item["title"], desc=item["desc"])
+    for spec in specs.values():
+        spec["title"] = spec["title"] if spec["title"] is not None else spec["name"]
+        spec["desc"] = spec["desc"] if spec["desc"] is not None else spec["title"]
+    return list(specs.values())
+
+def channels_digest(channels: List[Dict]) -> str:
+    return hashlib.sha1(json.dumps(channels, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ---------- Rendering ----------
+def render_channels(channels: List[Dict]) -> str:
+    out = [HEADER]
+    for ch in channels:
+        out.append(f'    <channel id={quoteattr(ch["id"])}>\n')
+        out.append(f'        <display-name lang="en">{escape(ch["name"])}</display-name>\n')
+        if ch.get("icon"):
+            out.append(f'        <icon src={quoteattr(ch["icon"])} />\n')
+        out.append("    </channel>\n")
+    return "".join(out)
+
+def render_day(channels: List[Dict], day: datetime.date) -> str:
+    """Hourly placeholder programmes for every channel; the last one ends at 23:59."""
+    stamp = day.strftime("%Y%m%d")
+    out = []
+    for ch in channels:
+        channel, title, desc = quoteattr(ch["id"]), escape(ch["title"]), escape(ch["desc"])
+        for hour in range(24):
+            stop = f"{stamp}{hour + 1:02d}0000" if hour < 23 else f"{stamp}235900"
+            out.append(f'    <programme start="{stamp}{hour:02d}0000 +0000" stop="{stop} +0000" channel={channel}>\n'
+                       f'        <title lang="en">{title}</title>\n'
+                       f'        <desc lang="en">{desc}</desc>\n'
+                       f'    </programme>\n')
+    return "".join(out)
+
+def encode_block(text: str, compress: bool) -> bytes:
+    data = text.encode("utf-8")
+    # One gzip member per block, mtime=0: identical input gives identical bytes,
+    # and members concatenate into a valid .gz that can be spliced without recompressing
+    return gzip.compress(data, compresslevel=9, mtime=0) if compress else data
+
+# ---------- Block manifest ----------
+def manifest_path(path: str) -> str:
+    return path + ".blocks.json"
+
+def load_manifest(path: str, compress: bool, digest: str) -> Optional[Dict]:
+    """Block offsets of the previously written guide, if that file is still the one described."""
+    try:
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        size = os.path.getsize(path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("gzip") != compress or manifest.get("channels") != digest or manifest.get("size") != size:
+        return None
+    return manifest
+
+# ---------- Writer ----------
+def write_guide(path: str, channels: List[Dict], days: List[datetime.date], compress: bool) -> Dict[str, int]:
+    """Write header + one block per day + footer, copying unchanged day blocks
+    from the previous file byte for byte. Returns reused/rendered counts."""
+    digest = channels_digest(channels)
+    manifest = load_manifest(path, compress, digest)
+    old_blocks = (manifest or {}).get("blocks", {})
+    stats = {"reused": 0, "rendered": 0}
+    blocks: Dict[str, List[int]] = {}
+
+    old = open(path, "rb") if manifest else None
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as out:
+            def put(name: str, render):
+                if name in old_blocks:
+                    offset, length = old_blocks[name]
+                    old.seek(offset)
+                    data = old.read(length)
+                    stats["reused"] += 1
+                else:
+                    data = encode_block(render(), compress)
+                    stats["rendered"] += 1
+                blocks[name] = [out.tell(), len(data)]
+                out.write(data)
+
+            put("channels", lambda: render_channels(channels))
+            for day in days:
+                put(day.isoformat(), lambda day=day: render_day(channels, day))
+            put("footer", lambda: FOOTER)
+            size = out.tell()
+    finally:
+        if old is not None:
+            old.close()
+    os.replace(tmp, path)
+
+    mtmp = manifest_path(path) + ".tmp"
+    with open(mtmp, "w", encoding="utf-8") as f:
+        json.dump({"gzip": compress, "channels": digest, "size": size, "blocks": blocks}, f, indent=1)
+    os.replace(mtmp, manifest_path(path))
+    return stats
+
+def window(today: datetime.date, days_back: int, days_ahead: int) -> List[datetime.date]:
+    return [today + datetime.timedelta(days=d) for d in range(-days_back, days_ahead + 1)]
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a rolling-window placeholder XMLTV guide")
+    ap.add_argument("--source", default=DEFAULT_EPG, help="Guide to read channel definitions from")
+    ap.add_argument("--out", default=DEFAULT_EPG, help="Output file (.xml or .xml.gz)")
+    ap.add_argument("--gzip", action="store_true", help="Compress (implied by a .gz output name)")
+    ap.add_argument("--days-back", type=int, default=1, help="Past days kept in the window")
+    ap.add_argument("--days-ahead", type=int, default=3, help="Upcoming days generated")
+    ap.add_argument("--today", default="", help="Window anchor as YYYY-MM-DD (default: today, UTC)")
+    args = ap.parse_args()
+
+    compress = args.gzip or args.out.endswith(".gz")
+    today = (datetime.date.fromisoformat(args.today) if args.today
+             else datetime.datetime.now(datetime.timezone.utc).date())
+    channels = load_channel_specs(args.source)
+    if not channels:
+        print(f"[FATAL] No channels found in {args.source}", file=sys.stderr)
+        sys.exit(2)
+
+    days = window(today, args.days_back, args.days_ahead)
+    stats = write_guide(args.out, channels, days, compress)
+    print(f"[DONE] {args.out}: {len(channels)} channels, {days[0]} .. {days[-1]} "
+          f"({stats['rendered']} blocks rendered, {stats['reused']} reused, {os.path.getsize(args.out)} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import re
+import logging
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("yt_logger")
+
+ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+# --- Master playlist parsing ---
+def parse_attributes(attr_list):
+    return {k: v.strip('"') for k, v in ATTR_RE.findall(attr_list)}
+
+def parse_master(text, base_url):
+    """Return the variant streams of an HLS master playlist.
+
+    Each variant is ``{url, bandwidth, width, height, codecs}``; an empty list
+    means the text was not a master playlist.
+    """
+    variants = []
+    attrs = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            attrs = parse_attributes(line.split(':', 1)[1])
+        elif line and not line.startswith('#') and attrs is not None:
+            width, _, height = (attrs.get('RESOLUTION') or '').partition('x')
+            variants.append({
+                'url': urllib.parse.urljoin(base_url, line),
+                'bandwidth': int(attrs.get('BANDWIDTH') or 0),
+                'width': int(width) if width.isdigit() else None,
+                'height': int(height) if height.isdigit() else None,
+                'codecs': attrs.get('CODECS', ''),
+            })
+            attrs = None
+    return variants
+
+def fetch_variants(master_url, timeout=10.0, user_agent=None):
+    req = urllib.request.Request(master_url)
+    if user_agent:
+        req.add_header('User-Agent', user_agent)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            text = resp.read().decode('utf-8', errors='ignore')
+    except Exception as e:
+        logger.warning(f"Could not fetch master playlist {master_url}: {e}")
+        return None
+    return parse_master(text, master_url)
+
+def fetch_all_variants(master_urls, workers=8, timeout=10.0, user_agent=None):
+    """{key: master_url} -> {key: variants or None}, fetched concurrently."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {key: pool.submit(fetch_variants, url, timeout, user_agent) for key, url in master_urls.items()}
+        return {key: fut.result() for key, fut in futures.items()}
+
+# --- Variant selection ---
+def select_variant(variants, max_height=None, max_bandwidth=None):
+    """Best variant within the caps, or the smallest one if none fits."""
+    if not variants:
+        return None
+
+    def fits(v):
+        if max_height and (v['height'] or 0) > max_height:
+            return False
+        if max_bandwidth and v['bandwidth'] > max_bandwidth:
+            return False
+        return True
+
+    def rank(v):
+        return v['height'] or 0, v['bandwidth']
+
+    candidates = [v for v in variants if fits(v)]
+    if candidates:
+        return max(candidates, key=rank)
+    return min(variants, key=rank)
+
+def variant_url(variants, master_url, max_height=None, max_bandwidth=None):
+    """Media playlist URL to publish, falling back to the master URL."""
+    chosen = select_variant(variants, max_height, max_bandwidth)
+    return chosen['url'] if chosen else master_url
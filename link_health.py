@@ -0,0 +1,327 @@
+import os
+import sys
+import json
+import time
+import signal
+import hashlib
+import argparse
+import datetime
+import subprocess
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+from static_movies import HTTP_POOL, GOVERNOR, http_open
+from link_store import LinkStore
+
+CATALOGUES = ["static_movies.json", "static_channels.json"]
+SNIFF_BYTES = 4096
+MP4_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pdin", b"styp", b"sidx", b"moof"}
+TS_PACKET = 188
+URL_SAFE = ":/?#[]@!$&'()*+,;=%~"
+
+# ---------- Catalogue files ----------
+def load_catalogue(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"[WARN] Catalogue {path} not found, skipping", file=sys.stderr)
+        return {}
+
+def save_catalogue(data: Dict[str, Dict], path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def catalogue_stamp(path: str, known: Optional[Dict] = None) -> Optional[Dict]:
+    """mtime/size/sha1 of a catalogue file, or None if it does not exist. The
+    hash is taken from ``known`` when mtime and size still match it."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if known and (known["mtime_ns"], known["size"]) == (st.st_mtime_ns, st.st_size):
+        return dict(known)
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": digest.hexdigest()}
+
+def edited_since(stamp: Optional[Dict], known: Optional[Dict]) -> bool:
+    return stamp is not None and (known is None or stamp["sha1"] != known["sha1"])
+
+def apply_result(link: Dict, result: Dict, today: str) -> bool:
+    """Update a link's status/first_online/last_online/last_offline (plus size and
+    first-byte latency when the HTTP probe measured them); True if anything changed."""
+    before = dict(link)
+    for key in ("content_length", "ttfb_ms"):
+        if result.get(key) is not None:
+            link[key] = result[key]
+    if result["online"]:
+        link["status"] = "online"
+        link["last_online"] = today
+        if not link.get("first_online"):
+            link["first_online"] = today
+    else:
+        link["status"] = "offline"
+        link["last_offline"] = today
+    return link != before
+
+def urls_to_check(catalogues: List[Dict[str, Dict]]) -> List[str]:
+    """Unique URLs, least recently checked first (never-checked ones lead), the
+    JSON-mode counterpart of ``LinkStore.urls_to_check``. A link was last checked
+    on the later of its last_online/last_offline dates; ties keep catalogue order."""
+    checked: Dict[str, str] = {}
+    for data in catalogues:
+        for entry in data.values():
+            for link in entry.get("links", []):
+                stamp = max(link.get("last_online") or "", link.get("last_offline") or "")
+                url = link["url"]
+                checked[url] = min(checked.get(url, stamp), stamp)
+    return sorted(checked, key=checked.__getitem__)
+
+# ---------- Native HTTP probe ----------
+def sniff_container(head: bytes) -> Optional[str]:
+    """'mp4' if the bytes start with ISO-BMFF boxes (ftyp/moov/...), 'ts' for an
+    MPEG-TS sync pattern, else None."""
+    if len(head) >= 8 and head[4:8] in MP4_BOXES:
+        size = int.from_bytes(head[:4], "big")
+        if size == 1 or size >= 8:
+            return "mp4"
+    if len(head) > TS_PACKET * 2 and head[0] == head[TS_PACKET] == head[TS_PACKET * 2] == 0x47:
+        return "ts"
+    return None
+
+def total_length(status: int, headers) -> Optional[int]:
+    if status == 206:
+        _, _, total = (headers.get("Content-Range") or "").rpartition("/")
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length") or ""
+    return int(length) if length.isdigit() else None
+
+def http_probe_link(url: str, timeout: float = 10.0, sniff_bytes: int = SNIFF_BYTES) -> Dict:
+    """Check a progressive file with one small Range request, no child process.
+
+    ``online`` is True/False when the answer is clear and None when it is not
+    (unknown container, server error), in which case ffprobe should decide.
+    ``content_length`` is only reported for a recognised media response, never
+    for the size of an error or login page.
+    """
+    result = {"online": None, "via": "http", "content_length": None, "ttfb_ms": None}
+    t0 = time.perf_counter()
+    try:
+        with http_open(urllib.parse.quote(url, safe=URL_SAFE), timeout=timeout,
+                       headers={"Range": f"bytes=0-{sniff_bytes - 1}"}) as resp:
+            head = resp.read(sniff_bytes)
+            status = resp.status
+            result["ttfb_ms"] = round((time.perf_counter() - t0) * 1000)
+            length = total_length(status, resp.headers)
+            content_type = (resp.headers.get("Content-Type") or "").lower()
+    except (OSError, ValueError) as e:
+        # Refused, unresolvable and timed-out hosts would fail ffprobe the same way
+        print(f"   - http error {url}: {e}", file=sys.stderr)
+        result["online"] = False
+        return result
+    except Exception as e:
+        print(f"   - http error {url}: {e}", file=sys.stderr)
+        return result
+
+    if 400 <= status < 500:
+        result["online"] = False
+    elif status in (200, 206):
+        if sniff_container(head):
+            result["online"] = True
+            result["content_length"] = length
+        elif content_type.startswith("text/html"):
+            result["online"] = False
+    return result
+
+# ---------- ffprobe ----------
+def ffprobe_link(url: str, timeout: float = 20.0, ffprobe: str = "ffprobe") -> bool:
+    """True if ffprobe finds at least one stream within ``timeout`` seconds.
+
+    The child runs in its own process group so a hung probe (and anything it
+    spawned) is killed outright when the deadline passes.
+    """
+    cmd = [ffprobe, "-v", "error", "-rw_timeout", str(int(timeout * 1_000_000)),
+           "-show_entries", "stream=codec_type", "-of", "csv=p=0", url]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                stdin=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        print(f"[WARN] Could not start {ffprobe}: {e}", file=sys.stderr)
+        return False
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.communicate()
+        return False
+    return proc.returncode == 0 and bool(out.strip())
+
+def check_link(url: str, timeout: float, ffprobe: str = "ffprobe", native: bool = True) -> Dict:
+    """HTTP probe first for http(s) links; ffprobe only when that is inconclusive."""
+    if native and urllib.parse.urlsplit(url).scheme in ("http", "https"):
+        result = http_probe_link(url, timeout)
+        if result["online"] is not None:
+            return result
+    else:
+        result = {"content_length": None, "ttfb_ms": None}
+    host = urllib.parse.urlsplit(url).hostname or ""
+    GOVERNOR.acquire(host)
+    t0 = time.monotonic()
+    online = False
+    try:
+        online = ffprobe_link(url, timeout, ffprobe)
+    finally:
+        # A dead link is not a sign of an overloaded host; only successes move the limit
+        GOVERNOR.release(host, time.monotonic() - t0, True if online else None)
+    return dict(result, online=online, via="ffprobe")
+
+def probe_all(urls: List[str], workers: int, timeout: float, budget: Optional[float],
+              ffprobe: str = "ffprobe", native: bool = True, on_result=None) -> Dict[str, Dict]:
+    """Check each URL once on a bounded worker pool.
+
+    URLs not started before ``budget`` seconds have elapsed are left out of
+    the result, so their catalogue entries keep the previous status.
+    ``on_result(url, result)`` is called as each check finishes.
+    """
+    deadline = time.time() + budget if budget else None
+    results: Dict[str, Dict] = {}
+    pending = iter(urls)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            while len(running) < workers and (deadline is None or time.time() < deadline):
+                url = next(pending, None)
+                if url is None:
+                    break
+                running[pool.submit(check_link, url, timeout, ffprobe, native)] = url
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url = running.pop(fut)
+                res = results[url] = fut.result()
+                print(f"   - {'online ' if res['online'] else 'offline'} ({res['via']}) {url}")
+                if on_result is not None:
+                    on_result(url, res)
+    return results
+
+# ---------- Playlist ----------
+def write_playlist(catalogues: List[Dict[str, Dict]], path: str) -> int:
+    count = 0
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("#EXTM3U\n")
+        for data in catalogues:
+            for title, entry in data.items():
+                link = next((l for l in entry.get("links", []) if l.get("status") == "online"), None)
+                if link is None:
+                    continue
+                attrs = "".join(f' {k}="{entry[v]}"' for k, v in
+                                (("tvg-id", "tvg_id"), ("tvg-logo", "tvg_logo"), ("group-title", "group"))
+                                if entry.get(v))
+                f.write(f"#EXTINF:-1{attrs},{title}\n{link['url']}\n")
+                count += 1
+    os.replace(tmp, path)
+    return count
+
+def main():
+    ap = argparse.ArgumentParser(description="Check catalogue links with ffprobe and update their online/offline status")
+    ap.add_argument("catalogues", nargs="*", default=CATALOGUES, help="Catalogue JSON files to update in place")
+    ap.add_argument("--workers", type=int, default=16, help="Concurrent ffprobe processes")
+    ap.add_argument("--timeout", type=float, default=20.0, help="Hard per-link timeout in seconds")
+    ap.add_argument("--budget", type=float, default=0.0,
+                    help="Stop starting new probes after this many seconds (0 = no limit)")
+    ap.add_argument("--ffprobe", default="ffprobe")
+    ap.add_argument("--no-native", action="store_true",
+                    help="Skip the HTTP Range probe and run ffprobe for every link")
+    ap.add_argument("--m3u", default="playlist.m3u")
+    ap.add_argument("--store", default="", help="SQLite link store; JSON catalogues become exports of it")
+    ap.add_argument("--reimport", action="store_true", help="Reload the store from the JSON catalogues even if unchanged")
+    ap.add_argument("--host-limit", type=int, default=4, help="Starting concurrent checks per host (adapts up/down)")
+    ap.add_argument("--host-max", type=int, default=16, help="Ceiling for the adaptive per-host limit")
+    ap.add_argument("--batch", type=int, default=200, help="Store: results written per transaction")
+    args = ap.parse_args()
+    today = datetime.date.today().isoformat()
+    GOVERNOR.initial = args.host_limit
+    GOVERNOR.max_limit = max(args.host_limit, args.host_max)
+
+    if args.store:
+        store = LinkStore(args.store)
+        for path in args.catalogues:
+            known = store.source_stamp(path)
+            stamp = catalogue_stamp(path, known)
+            if args.reimport or edited_since(stamp, known) or not store.has_catalogue(path):
+                # New or hand-edited JSON: bring the store in line before the export overwrites it
+                print(f"[INFO] Importing {path} into {args.store}")
+                store.import_catalogue(path, load_catalogue(path), stamp)
+            elif stamp is not None and stamp != known:
+                store.set_source_stamp(path, stamp)  # touched, same content
+        urls = store.urls_to_check(args.catalogues)
+    else:
+        store = None
+        catalogues = {path: load_catalogue(path) for path in args.catalogues}
+        urls = urls_to_check(list(catalogues.values()))
+    print(f"[INFO] Checking {len(urls)} links with {args.workers} workers")
+
+    batch: List = []
+    written = [0]
+
+    def record(url: str, res: Dict):
+        batch.append((url, res))
+        if len(batch) >= args.batch:
+            written[0] += store.record_results(batch, today)
+            batch.clear()
+
+    t0 = time.time()
+    results = probe_all(urls, args.workers, args.timeout, args.budget or None, args.ffprobe, not args.no_native,
+                        on_result=record if store else None)
+
+    if store:
+        written[0] += store.record_results(batch, today) if batch else 0
+        print(f"[INFO] {args.store}: {written[0]} link rows updated")
+        catalogues = {path: store.export_catalogue(path) for path in args.catalogues}
+        for path, data in catalogues.items():
+            known = store.source_stamp(path)
+            if edited_since(catalogue_stamp(path, known), known):
+                print(f"[WARN] {path} changed during the run; not overwriting it (imported next run)", file=sys.stderr)
+            elif data:
+                save_catalogue(data, path)
+                store.set_source_stamp(path, catalogue_stamp(path))
+        store.close()
+    else:
+        for path, data in catalogues.items():
+            changed = 0
+            for entry in data.values():
+                for link in entry.get("links", []):
+                    if link["url"] in results:
+                        changed += apply_result(link, results[link["url"]], today)
+            if data:
+                save_catalogue(data, path)
+            print(f"[INFO] {path}: {changed} links updated")
+
+    listed = write_playlist(list(catalogues.values()), args.m3u)
+    online = sum(1 for r in results.values() if r["online"])
+    spawned = sum(1 for r in results.values() if r["via"] == "ffprobe")
+    print("\n[DONE]")
+    print(f"- M3U: {args.m3u} ({listed} entries)")
+    print(f"- Online: {online}/{len(results)} checked, {len(urls) - len(results)} skipped by budget")
+    print(f"- ffprobe: {spawned} spawned, {len(results) - spawned} settled by the HTTP probe")
+    print(f"- HTTP: {HTTP_POOL.summary()}")
+    print(f"- Host limits: {GOVERNOR.summary()}")
+    print(f"- Elapsed: {time.time() - t0:.1f}s with workers={args.workers}")
+    HTTP_POOL.close_all()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n[INTERRUPTED]")
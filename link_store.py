@@ -0,0 +1,179 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    catalogue  TEXT NOT NULL,
+    title      TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    group_name TEXT,
+    year       INTEGER,
+    meta       TEXT NOT NULL,
+    PRIMARY KEY (catalogue, title)
+);
+CREATE TABLE IF NOT EXISTS links (
+    catalogue      TEXT NOT NULL,
+    title          TEXT NOT NULL,
+    position       INTEGER NOT NULL,
+    url            TEXT NOT NULL,
+    status         TEXT,
+    last_online    TEXT,
+    first_online   TEXT,
+    last_offline   TEXT,
+    content_length INTEGER,
+    ttfb_ms        INTEGER,
+    last_checked   REAL,
+    PRIMARY KEY (catalogue, title, position)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    catalogue TEXT PRIMARY KEY,
+    mtime_ns  INTEGER NOT NULL,
+    size      INTEGER NOT NULL,
+    sha1      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_group ON entries (group_name);
+CREATE INDEX IF NOT EXISTS idx_entries_year ON entries (year);
+CREATE INDEX IF NOT EXISTS idx_links_status ON links (status);
+CREATE INDEX IF NOT EXISTS idx_links_checked ON links (last_checked);
+CREATE INDEX IF NOT EXISTS idx_links_url ON links (url);
+"""
+
+LINK_FIELDS = ["url", "status", "last_online", "first_online", "last_offline", "content_length", "ttfb_ms"]
+
+ONLINE_SQL = """
+UPDATE links SET status = 'online', last_online = ?, first_online = COALESCE(first_online, ?),
+    content_length = COALESCE(?, content_length), ttfb_ms = COALESCE(?, ttfb_ms), last_checked = ?
+WHERE url = ?
+"""
+OFFLINE_SQL = """
+UPDATE links SET status = 'offline', last_offline = ?,
+    content_length = COALESCE(?, content_length), ttfb_ms = COALESCE(?, ttfb_ms), last_checked = ?
+WHERE url = ?
+"""
+
+class LinkStore:
+    """SQLite-backed link-health catalogue.
+
+    Each probe result touches only its own rows, so a run costs time in
+    proportion to what was checked rather than to catalogue size. WAL mode and
+    a busy timeout let several checkers write to the same file; the JSON
+    catalogues are produced with ``export_catalogue``.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def has_catalogue(self, catalogue: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM entries WHERE catalogue = ? LIMIT 1", (catalogue,)).fetchone() is not None
+
+    def source_stamp(self, catalogue: str) -> Optional[Dict]:
+        """mtime/size/sha1 of the JSON file as last imported or exported, if recorded."""
+        with self._lock:
+            row = self._db.execute("SELECT mtime_ns, size, sha1 FROM sources WHERE catalogue = ?", (catalogue,)).fetchone()
+        return dict(zip(("mtime_ns", "size", "sha1"), row)) if row else None
+
+    def set_source_stamp(self, catalogue: str, stamp: Dict):
+        with self._lock, self._db:
+            self._set_source_stamp(catalogue, stamp)
+
+    def _set_source_stamp(self, catalogue: str, stamp: Dict):
+        self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                         (catalogue, stamp["mtime_ns"], stamp["size"], stamp["sha1"]))
+
+    def import_catalogue(self, catalogue: str, data: Dict[str, Dict], stamp: Optional[Dict] = None) -> int:
+        """Replace ``catalogue`` with the contents of a JSON catalogue; returns the entry count.
+
+        Links whose title and URL are unchanged keep their ``last_checked``, so
+        re-importing an edited file does not send every link to the front of
+        the queue. ``stamp`` records which version of the file was imported.
+        """
+        entry_rows, link_rows = [], []
+        for seq, (title, entry) in enumerate(data.items()):
+            meta = {k: v for k, v in entry.items() if k != "links"}
+            year = meta.get("year")
+            entry_rows.append((catalogue, title, seq, meta.get("group"),
+                               year if isinstance(year, int) else None, json.dumps(meta, ensure_ascii=False)))
+            for pos, link in enumerate(entry.get("links", [])):
+                link_rows.append((catalogue, title, pos) + tuple(link.get(f) for f in LINK_FIELDS))
+        with self._lock, self._db:
+            checked = {(title, url): ts for title, url, ts in self._db.execute(
+                "SELECT title, url, last_checked FROM links WHERE catalogue = ? AND last_checked IS NOT NULL",
+                (catalogue,))}
+            self._db.execute("DELETE FROM entries WHERE catalogue = ?", (catalogue,))
+            self._db.execute("DELETE FROM links WHERE catalogue = ?", (catalogue,))
+            self._db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", entry_rows)
+            self._db.executemany(
+                f"INSERT INTO links (catalogue, title, position, {', '.join(LINK_FIELDS)}, last_checked) "
+                f"VALUES ({', '.join('?' * (4 + len(LINK_FIELDS)))})",
+                (row + (checked.get((row[1], row[3])),) for row in link_rows))
+            if stamp is not None:
+                self._set_source_stamp(catalogue, stamp)
+        return len(entry_rows)
+
+    def urls_to_check(self, catalogues: Optional[Iterable[str]] = None) -> List[str]:
+        """Unique URLs, least recently checked first (never-checked ones lead)."""
+        sql = "SELECT url, MIN(COALESCE(last_checked, 0)) AS checked FROM links"
+        params: Tuple = ()
+        if catalogues is not None:
+            names = list(catalogues)
+            sql += f" WHERE catalogue IN ({', '.join('?' * len(names))})"
+            params = tuple(names)
+        sql += " GROUP BY url ORDER BY checked, url"
+        with self._lock:
+            return [row[0] for row in self._db.execute(sql, params)]
+
+    def record_results(self, results: Iterable[Tuple[str, Dict]], today: str, now: Optional[float] = None) -> int:
+        """Apply ``(url, result)`` pairs in one transaction; returns the number of link rows updated."""
+        now = now if now is not None else time.time()
+        online, offline = [], []
+        for url, res in results:
+            if res["online"]:
+                online.append((today, today, res.get("content_length"), res.get("ttfb_ms"), now, url))
+            else:
+                offline.append((today, res.get("content_length"), res.get("ttfb_ms"), now, url))
+        with self._lock, self._db:
+            updated = self._db.executemany(ONLINE_SQL, online).rowcount if online else 0
+            updated += self._db.executemany(OFFLINE_SQL, offline).rowcount if offline else 0
+        return updated
+
+    def export_catalogue(self, catalogue: str) -> Dict[str, Dict]:
+        """The catalogue in its original JSON shape and order."""
+        with self._lock:
+            entries = self._db.execute(
+                "SELECT title, meta FROM entries WHERE catalogue = ? ORDER BY seq", (catalogue,)).fetchall()
+            links = self._db.execute(
+                f"SELECT title, {', '.join(LINK_FIELDS)} FROM links WHERE catalogue = ? ORDER BY title, position",
+                (catalogue,)).fetchall()
+
+        by_title: Dict[str, List[Dict]] = {}
+        for row in links:
+            link = dict(zip(LINK_FIELDS, row[1:]))
+            for optional in ("content_length", "ttfb_ms"):
+                if link[optional] is None:
+                    del link[optional]
+            by_title.setdefault(row[0], []).append(link)
+
+        data = {}
+        for title, meta in entries:
+            entry = json.loads(meta)
+            entry["links"] = by_title.get(title, [])
+            data[title] = entry
+        return data
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT COALESCE(status, 'unknown'), COUNT(*) FROM links GROUP BY status"))
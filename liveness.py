@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import random
+import logging
+import datetime
+
+logger = logging.getLogger("yt_logger")
+
+# --- History file ---
+# { channel_id: {buckets: {hour_of_week: [probes, live]}, last_probe, last_live} }
+history_file_path = 'liveness_history.json'
+
+# --- Hour-of-week model ---
+def hour_of_week(ts=None):
+    dt = datetime.datetime.fromtimestamp(ts if ts is not None else time.time(), datetime.timezone.utc)
+    return dt.weekday() * 24 + dt.hour
+
+def live_probability(entry, ts=None, prior_weight=2.0):
+    """Estimate P(live) for the channel at this hour of the week.
+
+    The hour bucket's own counts are blended with the channel's overall live
+    rate, so a bucket with few observations leans on the channel average and
+    an unseen channel starts near 0.5.
+    """
+    if not entry:
+        return 0.5
+
+    buckets = entry.get('buckets') or {}
+    total_probes = sum(b[0] for b in buckets.values())
+    total_live = sum(b[1] for b in buckets.values())
+    channel_rate = (total_live + 0.5) / (total_probes + 1.0)
+
+    probes, live = buckets.get(str(hour_of_week(ts)), (0, 0))
+    return (live + prior_weight * channel_rate) / (probes + prior_weight)
+
+def should_probe(entry, ts=None, floor=0.1, live_threshold=0.5, max_interval=6 * 3600, min_observations=5,
+                 rng=random):
+    """Decide whether a channel gets a yt_dlp extraction this run.
+
+    Channels with fewer than ``min_observations`` recorded probes and
+    likely-live channels are probed every run; the rest are probed with
+    probability ``max(floor, p)`` and at least once per ``max_interval``
+    seconds, so new broadcasts are still discovered.
+    """
+    if not entry:
+        return True
+
+    if sum(b[0] for b in (entry.get('buckets') or {}).values()) < min_observations:
+        return True
+
+    ts = ts if ts is not None else time.time()
+    p = live_probability(entry, ts)
+    if p >= live_threshold:
+        return True
+
+    if ts - (entry.get('last_probe') or 0) >= max_interval:
+        return True
+
+    return rng.random() < max(floor, p)
+
+def record_probe(history, channel_id, is_live, ts=None):
+    ts = int(ts if ts is not None else time.time())
+    entry = history.setdefault(channel_id, {'buckets': {}, 'last_probe': None, 'last_live': None})
+    bucket = entry['buckets'].setdefault(str(hour_of_week(ts)), [0, 0])
+    bucket[0] += 1
+    if is_live:
+        bucket[1] += 1
+        entry['last_live'] = ts
+    entry['last_probe'] = ts
+    return entry
+
+# --- Load / save ---
+def load_history(path=history_file_path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable liveness history {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_history(history, path=history_file_path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, sort_keys=True, separators=(',', ':'))
+    os.replace(tmp_path, path)
@@ -1,10 +1,17 @@
 import random
 import time
 import datetime
+import argparse
 import yt_dlp
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from channels import channel_metadata
+from manifest_cache import cache_file_path, load_cache, save_cache, make_entry, is_fresh, observed_live
+from hls_variants import fetch_all_variants, variant_url
+from yt_session import SessionPool, log_session_stats
+from liveness import history_file_path, load_history, save_history, should_probe, record_probe
 
 # --- Setup logging ---
 logger = logging.getLogger("yt_logger")
@@ -19,6 +26,10 @@ cookies_file_path = 'cookies.txt'
 if not os.path.exists(cookies_file_path):
     raise FileNotFoundError(f"Missing cookies file: {cookies_file_path}")
 
+# --- Network limits ---
+# yt_dlp socket timeout; keeps an abandoned worker from hanging past its deadline
+socket_timeout = 20
+
 # --- User-Agent generator ---
 def get_user_agent():
     versions = [
@@ -31,10 +42,41 @@ def get_user_agent():
         f"Chrome/{major}.0.{build}.{patch} Safari/537.36"
     )
 
-# --- Get live YouTube URL ---
-def get_live_watch_url(channel_id):
-    url = f"https://www.youtube.com/channel/{channel_id}/live"
-    ydl_opts = {
+# --- Extraction counters ---
+extraction_stats = {'live_lookups': 0, 'stream_lookups': 0, 'skipped': 0}
+_stats_lock = threading.Lock()
+
+def count_extraction(key):
+    with _stats_lock:
+        extraction_stats[key] += 1
+
+# --- Info dict helpers ---
+def find_live_entry(info):
+    if not info:
+        return None
+
+    if info.get("is_live"):
+        return info
+
+    for entry in info.get("entries") or []:
+        if entry and entry.get("is_live"):
+            return entry
+
+    return None
+
+def watch_url_for(entry):
+    return entry.get("webpage_url") or f"https://www.youtube.com/watch?v={entry['id']}"
+
+def pick_manifest_url(info):
+    return next(
+        (fmt['manifest_url'] for fmt in info.get('formats') or []
+         if fmt.get('protocol') in ['m3u8', 'm3u8_native'] and fmt.get('manifest_url')),
+        None
+    )
+
+# --- yt_dlp options ---
+def live_ydl_opts():
+    return {
         'cookiefile': cookies_file_path,
         'force_ipv4': True,
         'http_headers': {
@@ -43,35 +85,13 @@ def get_live_watch_url(channel_id):
             'Referer': 'https://www.youtube.com/',
             'Sec-Fetch-Mode': 'navigate',
         },
+        'socket_timeout': socket_timeout,
         'quiet': True,
         'no_warnings': True,
     }
 
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            if not info:
-                return None
-
-            if info.get("is_live"):
-                return info.get("webpage_url") or f"https://www.youtube.com/watch?v={info['id']}"
-
-            if "entries" in info:
-                for entry in info["entries"]:
-                    if entry.get("is_live"):
-                        return entry.get("webpage_url") or f"https://www.youtube.com/watch?v={entry['id']}"
-    except yt_dlp.utils.DownloadError as e:
-        logger.warning(f"Channel {channel_id} is not live or could not fetch info: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error for channel {channel_id}: {e}")
-        return None
-
-    return None
-
-# --- Get m3u8 stream URL ---
-def get_stream_url(url):
-    ydl_opts = {
+def stream_ydl_opts():
+    return {
         'format': 'best',
         'cookiefile': cookies_file_path,
         'force_ipv4': True,
@@ -85,22 +105,78 @@ def get_stream_url(url):
             'Referer': 'https://www.youtube.com/',
             'Sec-Fetch-Mode': 'navigate',
         },
+        'socket_timeout': socket_timeout,
         'quiet': True,
         'no_warnings': True
     }
 
+# --- Reused yt_dlp sessions (sized to --workers in main) ---
+live_sessions = SessionPool('live', live_ydl_opts, cookies_file_path=cookies_file_path)
+stream_sessions = SessionPool('stream', stream_ydl_opts, cookies_file_path=cookies_file_path)
+
+# --- Get live YouTube info ---
+# yt_dlp messages that mean YouTube answered and the channel simply has no live stream
+NOT_LIVE_MARKERS = ('not currently live', 'live event will begin', 'premieres in')
+
+def lookup_live(channel_id):
+    """Return (live entry or None, answered).
+
+    ``answered`` is True when the lookup itself worked, so a None entry really
+    means "not live"; throttling, network or cookie errors give False.
+    """
+    url = f"https://www.youtube.com/channel/{channel_id}/live"
+
+    count_extraction('live_lookups')
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with live_sessions.session() as ydl:
+            return find_live_entry(ydl.extract_info(url, download=False)), True
+    except yt_dlp.utils.DownloadError as e:
+        if any(marker in str(e).lower() for marker in NOT_LIVE_MARKERS):
+            logger.info(f"Channel {channel_id} is not live")
+            return None, True
+        logger.warning(f"Could not fetch live info for channel {channel_id}: {e}")
+        return None, False
+    except Exception as e:
+        logger.error(f"Unexpected error for channel {channel_id}: {e}")
+        return None, False
+
+def get_live_info(channel_id):
+    return lookup_live(channel_id)[0]
+
+# --- Get live YouTube URL ---
+def get_live_watch_url(channel_id):
+    entry = get_live_info(channel_id)
+    return watch_url_for(entry) if entry else None
+
+# --- Get m3u8 stream URL ---
+def get_stream_url(url):
+    count_extraction('stream_lookups')
+    try:
+        with stream_sessions.session() as ydl:
             info = ydl.extract_info(url, download=False)
-            return next(
-                (fmt['manifest_url'] for fmt in info['formats']
-                 if fmt.get('protocol') in ['m3u8', 'm3u8_native']),
-                None
-            )
+            return pick_manifest_url(info)
     except Exception as e:
         logger.error(f"Failed to get stream URL for {url}: {e}")
         return None
 
+# --- Resolve channel to (video id, m3u8 URL) ---
+def resolve_stream(channel_id):
+    """Single-extraction fast path; returns (video_id, m3u8_link, answered).
+
+    The /live extraction usually already carries ``formats``; only when it
+    does not (e.g. a flat channel-tab entry) is the watch URL extracted again.
+    """
+    entry, answered = lookup_live(channel_id)
+    if not entry:
+        return None, None, answered
+
+    m3u8_link = pick_manifest_url(entry)
+    if m3u8_link:
+        count_extraction('skipped')
+        return entry.get('id'), m3u8_link, True
+
+    return entry.get('id'), get_stream_url(watch_url_for(entry)), True
+
 # --- Format M3U line ---
 def format_live_link(channel_name, channel_logo, m3u8_link, channel_number, group_title):
     return (
@@ -112,40 +188,190 @@ def format_live_link(channel_name, channel_logo, m3u8_link, channel_number, grou
 # --- Save M3U file ---
 def save_m3u_file(output_data, base_filename="YT_playlist"):
     filename = f"{base_filename}.m3u"
+    tmp_filename = f"{filename}.tmp"
 
-    with open(filename, "w", encoding="utf-8") as file:
+    # Write to a temp file and swap it in so readers never see a partial playlist
+    with open(tmp_filename, "w", encoding="utf-8") as file:
         file.write("#EXTM3U\n")
         file.write(f"# Updated on {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         for data in output_data:
             file.write(data + "\n")
+    os.replace(tmp_filename, filename)
     logger.info(f"M3U playlist saved as {filename}")
 
+# --- Resolve one channel ---
+def resolve_channel(channel_id, metadata):
+    """Return a manifest cache entry for the channel (status 'ok', 'offline' or 'failed')."""
+    channel_name = metadata.get('channel_name', 'Unknown')
+
+    logger.info(f"Checking channel: {channel_name}")
+
+    video_id, m3u8_link, answered = resolve_stream(channel_id)
+    if not video_id:
+        logger.warning(f"Skipping {channel_name}: no live video found")
+    elif not m3u8_link:
+        logger.warning(f"Skipping {channel_name}: no stream link found")
+
+    return make_entry(video_id, m3u8_link, offline=answered and not video_id)
+
+# --- Format a channel entry ---
+def format_channel(metadata, m3u8_link):
+    return format_live_link(
+        metadata.get('channel_name', 'Unknown'),
+        metadata.get('channel_logo', ''),
+        m3u8_link,
+        metadata.get('channel_number', '0'),
+        metadata.get('group_title', 'Others'),
+    )
+
+# --- Resolve all channels concurrently ---
+def resolve_all(channels, workers=8, channel_timeout=90.0):
+    """Resolve channels on a bounded pool; returns {channel_id: cache_entry_or_None}.
+
+    A channel still running after ``channel_timeout`` seconds is abandoned so it
+    cannot hold up the rest of the run (its thread finishes on its own, bounded
+    by ``socket_timeout``).
+    """
+    results = {}
+    started = {}
+
+    def run(channel_id, metadata):
+        started[channel_id] = time.monotonic()
+        return resolve_channel(channel_id, metadata)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {pool.submit(run, cid, md): cid for cid, md in channels.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for fut in done:
+                channel_id = futures[fut]
+                try:
+                    results[channel_id] = fut.result()
+                except Exception as e:
+                    logger.error(f"Channel {channel_id} failed: {e}")
+                    results[channel_id] = None
+
+            now = time.monotonic()
+            for fut in list(pending):
+                channel_id = futures[fut]
+                t0 = started.get(channel_id)
+                if t0 is not None and now - t0 > channel_timeout:
+                    name = channels[channel_id].get('channel_name', channel_id)
+                    logger.warning(f"Skipping {name}: exceeded {channel_timeout:.0f}s deadline")
+                    results[channel_id] = None
+                    pending.discard(fut)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+def channel_sort_key(item):
+    channel_id, metadata = item
+    try:
+        number = int(metadata.get('channel_number', 0))
+    except (TypeError, ValueError):
+        number = 0
+    return number, channel_id
+
 # --- Main process ---
 def main():
-    output_data = []
-
-    for channel_id, metadata in channel_metadata.items():
-        channel_number = metadata.get('channel_number', '0')
-        group_title = metadata.get('group_title', 'Others')
-        channel_name = metadata.get('channel_name', 'Unknown')
-        channel_logo = metadata.get('channel_logo', '')
-
-        logger.info(f"Checking channel: {channel_name}")
-
-        live_link = get_live_watch_url(channel_id)
-        if not live_link:
-            logger.warning(f"Skipping {channel_name}: no live video found")
-            continue
-
-        m3u8_link = get_stream_url(live_link)
-        if not m3u8_link:
-            logger.warning(f"Skipping {channel_name}: no stream link found")
-            continue
-
-        formatted_info = format_live_link(
-            channel_name, channel_logo, m3u8_link, channel_number, group_title
-        )
-        output_data.append(formatted_info)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=8, help="Channels resolved concurrently")
+    ap.add_argument("--channel-timeout", type=float, default=90.0, help="Per-channel deadline in seconds")
+    ap.add_argument("--cache", default=cache_file_path, help="Manifest cache file")
+    ap.add_argument("--no-cache", action="store_true", help="Re-resolve every channel")
+    ap.add_argument("--refresh-margin", type=float, default=1800.0,
+                    help="Re-resolve manifests expiring within this many seconds")
+    ap.add_argument("--history", default=history_file_path, help="Liveness history file")
+    ap.add_argument("--no-schedule", action="store_true", help="Probe every channel regardless of liveness history")
+    ap.add_argument("--probe-floor", type=float, default=0.1,
+                    help="Minimum probe probability for likely-offline channels")
+    ap.add_argument("--max-skip", type=float, default=6 * 3600,
+                    help="Probe every channel at least this often (seconds)")
+    ap.add_argument("--min-observations", type=int, default=5,
+                    help="Always probe channels with fewer recorded probes than this")
+    ap.add_argument("--max-height", type=int, help="Publish the best variant up to this height instead of the master playlist")
+    ap.add_argument("--max-bandwidth", type=int, help="Publish the best variant up to this bandwidth (bits/s)")
+    ap.add_argument("--tiers", default="", help="Also write YT_playlist_<h>p.m3u per height, e.g. 360,720")
+    args = ap.parse_args()
+    live_sessions.size = stream_sessions.size = max(1, args.workers)
+
+    t0 = time.time()
+    cache = {} if args.no_cache else load_cache(args.cache)
+    stale = {
+        channel_id: metadata for channel_id, metadata in channel_metadata.items()
+        if not is_fresh(cache.get(channel_id), args.refresh_margin)
+    }
+    logger.info(f"{len(channel_metadata) - len(stale)} channels served from cache, {len(stale)} to resolve")
+
+    # Channels that were live last time are always probed; the rest follow history
+    history = {} if args.no_schedule else load_history(args.history)
+    now = time.time()
+    to_probe = {
+        channel_id: metadata for channel_id, metadata in stale.items()
+        if args.no_schedule
+        or (cache.get(channel_id) or {}).get('status') == 'ok'
+        or should_probe(history.get(channel_id), now, floor=args.probe_floor, max_interval=args.max_skip,
+                        min_observations=args.min_observations)
+    }
+    if len(to_probe) < len(stale):
+        logger.info(f"Skipping {len(stale) - len(to_probe)} likely-offline channels this run")
+
+    results = resolve_all(to_probe, workers=args.workers, channel_timeout=args.channel_timeout)
+    for channel_id in stale:
+        entry = results.get(channel_id)
+        if entry is not None:
+            if observed_live(entry) is not None:
+                record_probe(history, channel_id, observed_live(entry), now)
+        elif is_fresh(cache.get(channel_id), 0, now):
+            continue  # timed out, but the old manifest has not expired yet
+        cache[channel_id] = entry or make_entry(None, None)
+
+    # Keep playlist order deterministic regardless of completion order
+    live = [
+        (channel_id, metadata)
+        for channel_id, metadata in sorted(channel_metadata.items(), key=channel_sort_key)
+        if cache[channel_id].get('status') == 'ok'
+    ]
+    output_data = [format_channel(metadata, cache[channel_id]['manifest_url']) for channel_id, metadata in live]
+
+    tiers = [int(t) for t in args.tiers.split(',') if t.strip()] if args.tiers else []
+    if args.max_height or args.max_bandwidth or tiers:
+        masters = {channel_id: cache[channel_id]['manifest_url'] for channel_id, _ in live}
+        variants = fetch_all_variants(masters, workers=args.workers, user_agent=get_user_agent())
+        if args.max_height or args.max_bandwidth:
+            output_data = [
+                format_channel(metadata, variant_url(variants.get(channel_id), masters[channel_id],
+                                                     args.max_height, args.max_bandwidth))
+                for channel_id, metadata in live
+            ]
+        for height in tiers:
+            save_m3u_file([
+                format_channel(metadata, variant_url(variants.get(channel_id), masters[channel_id],
+                                                     height, args.max_bandwidth))
+                for channel_id, metadata in live
+            ], f"YT_playlist_{height}p")
+
+    logger.info(
+        f"Resolved {len(output_data)}/{len(channel_metadata)} channels in "
+        f"{time.time() - t0:.1f}s with workers={args.workers}"
+    )
+    logger.info(
+        f"yt_dlp extractions: {extraction_stats['live_lookups']} live + "
+        f"{extraction_stats['stream_lookups']} stream "
+        f"({extraction_stats['skipped']} second extractions skipped)"
+    )
+    log_session_stats(live_sessions, stream_sessions)
+
+    live_sessions.close()
+    stream_sessions.close()
+
+    if not args.no_cache:
+        save_cache(cache, args.cache)
+    if not args.no_schedule:
+        save_history(history, args.history)
 
     if output_data:
         save_m3u_file(output_data)
@@ -0,0 +1,79 @@
+import os
+import re
+import json
+import time
+import logging
+import urllib.parse
+
+logger = logging.getLogger("yt_logger")
+
+# --- Cache file ---
+# { channel_id: {video_id, manifest_url, expire, status, checked} }
+# status: 'ok' (live, manifest known), 'offline' (YouTube says not live), 'failed' (lookup error)
+cache_file_path = 'manifest_cache.json'
+
+EXPIRE_PATH_RE = re.compile(r'/expire/(\d+)(?:/|$)')
+
+# --- Expiry parsing ---
+def parse_expiry(manifest_url):
+    """Return the unix expiry carried by a googlevideo URL, or None."""
+    if not manifest_url:
+        return None
+
+    m = EXPIRE_PATH_RE.search(manifest_url)
+    if m:
+        return int(m.group(1))
+
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(manifest_url).query)
+    value = (query.get('expire') or [None])[0]
+    return int(value) if value and value.isdigit() else None
+
+# --- Entries ---
+def make_entry(video_id, manifest_url, now=None, offline=False):
+    now = int(now if now is not None else time.time())
+    if not manifest_url:
+        return {'video_id': video_id, 'manifest_url': None, 'expire': None,
+                'status': 'offline' if offline else 'failed', 'checked': now}
+    return {
+        'video_id': video_id,
+        'manifest_url': manifest_url,
+        'expire': parse_expiry(manifest_url),
+        'status': 'ok',
+        'checked': now,
+    }
+
+def observed_live(entry):
+    """True/False when the entry is a real liveness observation, None for a failed lookup."""
+    if entry.get('video_id'):
+        return True
+    if entry.get('status') == 'offline':
+        return False
+    return None
+
+def is_fresh(entry, margin, now=None):
+    """True when a cached manifest stays valid for more than ``margin`` seconds."""
+    if not entry or entry.get('status') != 'ok' or not entry.get('manifest_url'):
+        return False
+    expire = entry.get('expire')
+    if not expire:
+        return False
+    now = now if now is not None else time.time()
+    return expire - now > margin
+
+# --- Load / save ---
+def load_cache(path=cache_file_path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest cache {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_cache(cache, path=cache_file_path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,124 @@
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from channels import channel_metadata
+from main import logger, resolve_channel, format_channel, channel_sort_key
+from manifest_cache import cache_file_path, load_cache, save_cache, make_entry, is_fresh
+
+# --- Lazy resolver ---
+class LazyResolver:
+    """Channel id -> still-valid manifest URL, resolving only on a cache miss.
+
+    Concurrent requests for the same channel wait on one in-flight
+    resolution instead of each starting their own.
+    """
+
+    def __init__(self, cache_path=cache_file_path, min_validity=120.0, negative_ttl=120.0):
+        self.cache_path = cache_path
+        self.min_validity = min_validity
+        self.negative_ttl = negative_ttl
+        self.table = load_cache(cache_path) if cache_path else {}
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def lookup(self, channel_id):
+        now = time.time()
+        with self.lock:
+            entry = self.table.get(channel_id)
+            if is_fresh(entry, self.min_validity, now):
+                return entry['manifest_url']
+            if entry and entry.get('status') != 'ok' and now - (entry.get('checked') or 0) < self.negative_ttl:
+                return None
+
+            event = self.in_flight.get(channel_id)
+            owner = event is None
+            if owner:
+                event = self.in_flight[channel_id] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self.lock:
+                entry = self.table.get(channel_id) or {}
+            return entry.get('manifest_url') if entry.get('status') == 'ok' else None
+
+        try:
+            try:
+                entry = resolve_channel(channel_id, channel_metadata[channel_id])
+            except Exception as e:
+                logger.error(f"Channel {channel_id} failed: {e}")
+                entry = make_entry(None, None)
+            with self.lock:
+                self.table[channel_id] = entry
+                if self.cache_path:
+                    save_cache(self.table, self.cache_path)
+        finally:
+            with self.lock:
+                del self.in_flight[channel_id]
+            event.set()
+
+        return entry.get('manifest_url') if entry.get('status') == 'ok' else None
+
+# --- HTTP handler ---
+class PlaylistHandler(BaseHTTPRequestHandler):
+    resolver = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path in ('/', '/playlist.m3u'):
+            return self.send_playlist()
+        if path.startswith('/play/'):
+            return self.send_redirect(path[len('/play/'):].strip('/'))
+        self.send_error(404, "Not found")
+
+    def send_playlist(self):
+        host = self.headers.get('Host') or f"{self.server.server_address[0]}:{self.server.server_address[1]}"
+        lines = ["#EXTM3U"]
+        for channel_id, metadata in sorted(channel_metadata.items(), key=channel_sort_key):
+            lines.append(format_channel(metadata, f"http://{host}/play/{channel_id}"))
+        body = ("\n".join(lines) + "\n").encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/x-mpegurl; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_redirect(self, channel_id):
+        if channel_id not in channel_metadata:
+            return self.send_error(404, "Unknown channel")
+
+        manifest_url = self.resolver.lookup(channel_id)
+        if not manifest_url:
+            return self.send_error(503, "Channel is not live")
+
+        self.send_response(302)
+        self.send_header("Location", manifest_url)
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the YouTube playlist with lazily resolved /play/<channel_id> redirects")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--cache", default=cache_file_path, help="Manifest cache file (shared with main.py)")
+    ap.add_argument("--min-validity", type=float, default=120.0,
+                    help="Re-resolve manifests expiring within this many seconds")
+    args = ap.parse_args()
+
+    PlaylistHandler.resolver = LazyResolver(args.cache, min_validity=args.min_validity)
+    server = ThreadingHTTPServer((args.host, args.port), PlaylistHandler)
+    logger.info(f"Serving playlist on http://{args.host}:{args.port}/playlist.m3u")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
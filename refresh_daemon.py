@@ -0,0 +1,123 @@
+import time
+import heapq
+import random
+import signal
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from channels import channel_metadata
+from main import logger, resolve_channel, format_channel, channel_sort_key, save_m3u_file, live_sessions, stream_sessions
+from manifest_cache import cache_file_path, load_cache, save_cache, make_entry, is_fresh, observed_live
+from liveness import history_file_path, load_history, save_history, record_probe
+
+# --- Scheduling ---
+def next_due(entry, failures, now, margin, default_ttl=3600, base_backoff=300, max_backoff=3600):
+    """When the channel should be re-resolved next.
+
+    Live channels are refreshed ``margin`` seconds before their manifest
+    expires; offline or failed ones back off exponentially (with jitter).
+    """
+    if entry.get('status') == 'ok':
+        expire = entry.get('expire')
+        if expire:
+            return max(now + 60, expire - margin)
+        return now + default_ttl
+
+    delay = min(max_backoff, base_backoff * 2 ** max(0, failures - 1))
+    return now + delay * random.uniform(0.8, 1.2)
+
+def build_playlist(table):
+    return [
+        format_channel(metadata, table[channel_id]['manifest_url'])
+        for channel_id, metadata in sorted(channel_metadata.items(), key=channel_sort_key)
+        if (table.get(channel_id) or {}).get('status') == 'ok'
+    ]
+
+# --- Daemon loop ---
+def run(workers=4, margin=1800.0, cache_path=cache_file_path, history_path=history_file_path,
+        base_filename="YT_playlist"):
+    live_sessions.size = stream_sessions.size = max(1, workers)
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+
+    table = load_cache(cache_path)
+    history = load_history(history_path)
+    failures = {}
+    queue = []
+    now = time.time()
+    for seq, channel_id in enumerate(channel_metadata):
+        entry = table.get(channel_id)
+        due = next_due(entry, 0, now, margin) if is_fresh(entry, margin, now) else now
+        heapq.heappush(queue, (due, seq, channel_id))
+
+    written = build_playlist(table)
+    if written:
+        save_m3u_file(written, base_filename)
+    logger.info(f"Daemon started: {len(channel_metadata)} channels, workers={workers}")
+
+    seq = len(channel_metadata)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while not stop:
+            now = time.time()
+            while queue and queue[0][0] <= now:
+                _, _, channel_id = heapq.heappop(queue)
+                fut = pool.submit(resolve_channel, channel_id, channel_metadata[channel_id])
+                in_flight[fut] = channel_id
+
+            timeout = max(0.0, min(queue[0][0] - now, 5.0)) if queue else 5.0
+            if not in_flight:
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            changed = False
+            now = time.time()
+            for fut in done:
+                channel_id = in_flight.pop(fut)
+                try:
+                    entry = fut.result()
+                except Exception as e:
+                    logger.error(f"Channel {channel_id} failed: {e}")
+                    entry = make_entry(None, None)
+
+                if observed_live(entry) is not None:
+                    record_probe(history, channel_id, observed_live(entry), now)
+                failures[channel_id] = 0 if entry['status'] == 'ok' else failures.get(channel_id, 0) + 1
+                previous = table.get(channel_id) or {}
+                if entry['status'] != 'ok' and is_fresh(previous, 0, now):
+                    entry = previous  # keep serving the old manifest until it actually expires
+                changed |= entry.get('manifest_url') != previous.get('manifest_url')
+                table[channel_id] = entry
+
+                due = next_due(entry, failures[channel_id], now, margin)
+                heapq.heappush(queue, (due, seq, channel_id))
+                seq += 1
+
+            if changed:
+                playlist = build_playlist(table)
+                if playlist != written:
+                    save_m3u_file(playlist, base_filename)
+                    written = playlist
+                save_cache(table, cache_path)
+                save_history(history, history_path)
+
+    save_cache(table, cache_path)
+    save_history(history, history_path)
+    live_sessions.close()
+    stream_sessions.close()
+    logger.info("Daemon stopped")
+
+def main():
+    ap = argparse.ArgumentParser(description="Keep YT_playlist.m3u fresh by re-resolving each channel before its manifest expires")
+    ap.add_argument("--workers", type=int, default=4, help="Channels resolved concurrently")
+    ap.add_argument("--refresh-margin", type=float, default=1800.0,
+                    help="Re-resolve manifests this many seconds before they expire")
+    ap.add_argument("--cache", default=cache_file_path, help="Manifest cache file")
+    ap.add_argument("--history", default=history_file_path, help="Liveness history file")
+    args = ap.parse_args()
+
+    run(workers=args.workers, margin=args.refresh_margin, cache_path=args.cache, history_path=args.history)
+
+if __name__ == '__main__':
+    main()
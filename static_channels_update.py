@@ -4,26 +4,37 @@
 All-in-one, "all baked in" extractor for working .m3u8 links from http://172.31.169.169
 
 - Pure Python standard library (no external dependencies)
-- Concurrent using ThreadPoolExecutor
-- Scrapes token.php pages and limited child resources for m3u8 URLs
-- Validates candidates by fetching first ~8KB and checking for #EXTM3U
+- Concurrent using asyncio (default) or ThreadPoolExecutor (--engine threads)
+- Keep-alive connection pool (per host) with DNS cache shared by all threads
+- Adaptive per-host concurrency (AIMD) shared by both engines
+- Optional on-disk HTTP cache (ETag/Last-Modified revalidation, max-age freshness)
+- Scrapes token.php pages (scanned as they stream in) and limited child resources for m3u8 URLs
+- Validates candidates by streaming at most ~8KB and classifying master/media/non-HLS
 - Saves CSV and M3U files
 
 Usage:
   python extract_m3u8_all_baked_in.py --base http://172.31.169.169 --concurrency 30 --timeout 10
+  python extract_m3u8_all_baked_in.py --engine asyncio --max-requests 64 --per-host 16
 """
 import re
+import os
 import csv
 import sys
+import asyncio
 import time
 import html
 import json
+import codecs
+import socket
+import hashlib
 import argparse
+import threading
+import http.client
+import ssl
 import urllib.parse
-import urllib.request
-import urllib.error
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Set, Tuple
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 
 DEFAULT_BASE = "http://172.31.169.169"
 HEADERS = {
@@ -46,113 +57,1027 @@ def absolutize(base_url: str, maybe_url: str) -> str:
         return maybe_url
     return urllib.parse.urljoin(base_url, maybe_url)
 
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+class _PooledHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, host: str, port: int, timeout: float, pool: "ConnectionPool"):
+        super().__init__(host, port, timeout=timeout)
+        self._pool = pool
+
+    def connect(self):
+        self.sock = self._pool.create_socket(self.host, self.port, self.timeout)
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, host: str, port: int, timeout: float, pool: "ConnectionPool"):
+        super().__init__(host, port, timeout=timeout, context=ssl.create_default_context())
+        self._pool = pool
+
+    def connect(self):
+        sock = self._pool.create_socket(self.host, self.port, self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+class ConnectionPool:
+    """Thread-safe per-host keep-alive connections with a small DNS cache.
+
+    At most ``max_per_host`` idle connections are kept per (scheme, host, port);
+    idle ones older than ``idle_timeout`` seconds are dropped instead of reused.
+    """
+
+    def __init__(self, max_per_host: int = 8, idle_timeout: float = 30.0, dns_ttl: float = 300.0):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.dns_ttl = dns_ttl
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._dns: Dict[Tuple[str, int], Tuple[float, list]] = {}
+        self.stats = {"requests": 0, "new": 0, "reused": 0, "expired": 0, "dns_hits": 0, "dns_misses": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def resolve(self, host: str, port: int) -> list:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dns.get((host, port))
+            if cached and now - cached[0] < self.dns_ttl:
+                self.stats["dns_hits"] += 1
+                return cached[1]
+            self.stats["dns_misses"] += 1
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            self._dns[(host, port)] = (now, infos)
+        return infos
+
+    def create_socket(self, host: str, port: int, timeout: float) -> socket.socket:
+        last_err: Optional[Exception] = None
+        for family, socktype, proto, _, addr in self.resolve(host, port):
+            sock = socket.socket(family, socktype, proto)
+            try:
+                sock.settimeout(timeout)
+                sock.connect(addr)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return sock
+            except OSError as e:
+                last_err = e
+                sock.close()
+        with self._lock:
+            self._dns.pop((host, port), None)
+        raise last_err or OSError(f"could not connect to {host}:{port}")
+
+    def acquire(self, scheme: str, host: str, port: int, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        key = (scheme, host, port)
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    self.stats["reused"] += 1
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                self.stats["expired"] += 1
+                conn.close()
+            self.stats["new"] += 1
+        cls = _PooledHTTPSConnection if scheme == "https" else _PooledHTTPConnection
+        return cls(host, port, timeout, self), False
+
+    def release(self, scheme: str, host: str, port: int, conn: http.client.HTTPConnection):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def summary(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+        opened = s["new"] + s["reused"]
+        reuse = 100.0 * s["reused"] / opened if opened else 0.0
+        return (f"{s['requests']} requests, {s['new']} new connections, {s['reused']} reused ({reuse:.0f}%), "
+                f"DNS {s['dns_hits']} hits/{s['dns_misses']} misses")
+
+HTTP_POOL = ConnectionPool()
+
+def _wake_future(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_result(None)
+
+class HostGovernor:
+    """Per-host concurrency limits that adapt to how each host copes (AIMD).
+
+    Every host starts at ``initial`` concurrent requests. A success whose
+    latency stays within ``slow_factor`` times the best latency seen adds
+    1/limit (about +1 per round of requests); an error, 429 or 5xx halves the
+    limit, at most once per average round-trip so one burst of failures
+    counts once. Thread callers use acquire/release, asyncio callers
+    aacquire/release; both share the same limits.
+    """
+
+    def __init__(self, initial: int = 8, min_limit: int = 1, max_limit: int = 32, slow_factor: float = 3.0):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slow_factor = slow_factor
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._hosts: Dict[str, Dict] = {}
+
+    def _host(self, host: str) -> Dict:
+        h = self._hosts.get(host)
+        if h is None:
+            h = self._hosts[host] = {"limit": float(self.initial), "active": 0, "waiting": 0, "ok": 0,
+                                     "errors": 0, "ewma": None, "best": None, "last_cut": 0.0, "waiters": deque()}
+        return h
+
+    def _wake(self, h: Dict):
+        self._cond.notify_all()
+        free = int(h["limit"]) - h["active"]
+        while free > 0 and h["waiters"]:
+            fut = h["waiters"].popleft()
+            fut.get_loop().call_soon_threadsafe(_wake_future, fut)
+            free -= 1
+
+    def acquire(self, host: str):
+        if not self.enabled:
+            return
+        with self._cond:
+            h = self._host(host)
+            h["waiting"] += 1
+            while h["active"] >= int(h["limit"]):
+                self._cond.wait()
+            h["waiting"] -= 1
+            h["active"] += 1
+
+    async def aacquire(self, host: str):
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                h = self._host(host)
+                if h["active"] < int(h["limit"]):
+                    h["active"] += 1
+                    return
+                fut = asyncio.get_running_loop().create_future()
+                h["waiters"].append(fut)
+                h["waiting"] += 1
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    if fut in h["waiters"]:
+                        h["waiters"].remove(fut)
+                    else:
+                        self._wake(h)  # pass the wake-up we were given on to the next waiter
+                raise
+            finally:
+                with self._lock:
+                    h["waiting"] -= 1
+
+    def _adjust(self, h: Dict, latency: float, outcome: Optional[bool]):
+        if outcome:
+            h["ok"] += 1
+            h["ewma"] = latency if h["ewma"] is None else 0.8 * h["ewma"] + 0.2 * latency
+            h["best"] = latency if h["best"] is None else min(h["best"], latency)
+            if latency <= self.slow_factor * max(h["best"], 0.005):
+                h["limit"] = min(float(self.max_limit), h["limit"] + 1.0 / h["limit"])
+        elif outcome is False:
+            h["errors"] += 1
+            now = time.monotonic()
+            if now - h["last_cut"] >= (h["ewma"] or 0.0):
+                h["limit"] = max(float(self.min_limit), h["limit"] / 2)
+                h["last_cut"] = now
+
+    def release(self, host: str, latency: float, outcome: Optional[bool]):
+        """``outcome``: True for a healthy response, False for an error/429/5xx,
+        None when the request says nothing about the host (e.g. cancelled)."""
+        if not self.enabled:
+            return
+        with self._cond:
+            h = self._host(host)
+            h["active"] -= 1
+            self._adjust(h, latency, outcome)
+            self._wake(h)
+
+    @staticmethod
+    def healthy(status: int) -> bool:
+        return status != 429 and status < 500
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current limit, in-flight and queued requests per host."""
+        with self._lock:
+            return {host: {"limit": int(h["limit"]), "active": h["active"], "waiting": h["waiting"], "ok": h["ok"],
+                           "errors": h["errors"], "ewma_ms": round((h["ewma"] or 0.0) * 1000)}
+                    for host, h in self._hosts.items()}
+
+    def summary(self, top: int = 5) -> str:
+        hosts = sorted(self.snapshot().items(), key=lambda kv: -(kv[1]["ok"] + kv[1]["errors"]))
+        if not hosts:
+            return "no requests"
+        return ", ".join(f"{host} limit={s['limit']} ({s['ok']} ok/{s['errors']} err, ~{s['ewma_ms']} ms)"
+                         for host, s in hosts[:top])
+
+GOVERNOR = HostGovernor()
+
+class PooledResponse:
+    """A response on a pooled connection; the connection goes back to the pool
+    once the body has been fully read, otherwise it is closed."""
+
+    def __init__(self, url: str, key: Tuple[str, str, int], conn: http.client.HTTPConnection,
+                 resp: http.client.HTTPResponse, pool: ConnectionPool, governor: Optional[HostGovernor] = None,
+                 latency: float = 0.0):
+        self.url = url
+        self.status = resp.status
+        self.headers = resp.headers
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._pool = pool
+        self._governor = governor
+        self.latency = latency
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._resp.read(amt) if amt is not None else self._resp.read()
+
+    def read1(self, amt: int) -> bytes:
+        """Whatever is available (up to ``amt``) without waiting for a full buffer."""
+        return self._resp.read1(amt)
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._governor is not None:
+            self._governor.release(self._key[1], self.latency, HostGovernor.healthy(self.status))
+        if self._resp.isclosed() and not self._resp.will_close:
+            self._pool.release(*self._key, self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def http_open(url: str, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None,
+              pool: Optional[ConnectionPool] = None, governor: Optional[HostGovernor] = None) -> PooledResponse:
+    """GET ``url`` on a pooled keep-alive connection, following redirects.
+
+    Each hop holds a governor slot for its host until the response is closed.
+    Raises on network errors; HTTP error statuses are returned, not raised.
+    """
+    pool = pool or HTTP_POOL
+    governor = governor or GOVERNOR
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        pool._count("requests")
+        governor.acquire(parts.hostname)
+        t0 = time.monotonic()
+        try:
+            for attempt in range(2):
+                conn, reused = pool.acquire(scheme, parts.hostname, port, timeout)
+                try:
+                    conn.request("GET", path, headers=headers or {})
+                    resp = conn.getresponse()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.BadStatusLine):
+                    conn.close()
+                    # A reused keep-alive socket may have been closed by the server; retry once fresh
+                    if not reused or attempt:
+                        raise
+                except Exception:
+                    conn.close()
+                    raise
+        except BaseException:
+            governor.release(parts.hostname, time.monotonic() - t0, False)
+            raise
+
+        result = PooledResponse(url, (scheme, parts.hostname, port), conn, resp, pool, governor, time.monotonic() - t0)
+        location = resp.headers.get("Location")
+        if resp.status in REDIRECT_CODES and location:
+            try:
+                result.read()
+            finally:
+                result.close()
+            url = urllib.parse.urljoin(url, location)
+            continue
+        return result
+    raise http.client.HTTPException(f"too many redirects: {url}")
+
+def charset_of(content_type: str) -> str:
+    for param in (content_type or "").split(";")[1:]:
+        k, _, v = param.strip().partition("=")
+        if k.lower() == "charset" and v:
+            try:
+                return codecs.lookup(v.strip('"')).name
+            except LookupError:
+                break
+    return "utf-8"
+
+def decode_body(data: bytes, content_type: str) -> str:
+    return data.decode(charset_of(content_type), errors="ignore")
+
+CACHED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+
+class HTTPCache:
+    """On-disk cache for full-page GETs (homepage, token.php pages, child iframes).
+
+    Responses with ETag/Last-Modified are revalidated with If-None-Match /
+    If-Modified-Since; ``Cache-Control: max-age`` (or ``default_max_age`` for
+    pages without validators) lets a stored copy be reused without a request.
+    Least recently used entries are evicted once the cache exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024, default_max_age: float = 300.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_max_age = default_max_age
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, Tuple[int, float]] = {}
+        self.stats = {"fresh": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+        os.makedirs(directory, exist_ok=True)
+        for fn in os.listdir(directory):
+            if fn.endswith(".body"):
+                st = os.stat(os.path.join(directory, fn))
+                self._sizes[fn[:-5]] = (st.st_size, st.st_mtime)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key + ext)
+
+    def _load(self, url: str) -> Optional[Tuple[str, Dict, bytes]]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        try:
+            with open(self._path(key, ".json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(key, ".body"), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return (key, meta, body) if meta.get("url") == url else None
+
+    def _write(self, key: str, meta: Dict, body: Optional[bytes]):
+        for ext, payload in ((".json", json.dumps(meta).encode("utf-8")), (".body", body)):
+            if payload is None:
+                continue
+            tmp = self._path(key, ext) + f".{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key, ext))
+
+    def _max_age(self, headers: Dict[str, str]) -> Optional[float]:
+        """None means do not store."""
+        cc = headers.get("cache-control", "")
+        if "no-store" in cc.lower():
+            return None
+        m = MAX_AGE_RE.search(cc)
+        if m:
+            return float(m.group(1))
+        if headers.get("etag") or headers.get("last-modified"):
+            return 0.0
+        return self.default_max_age
+
+    def _store(self, url: str, headers: Dict[str, str], body: bytes):
+        max_age = self._max_age(headers)
+        if max_age is None:
+            return
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        meta = {"url": url, "stored": time.time(), "max_age": max_age,
+                "headers": {k: headers[k] for k in CACHED_HEADERS if headers.get(k)}}
+        self._write(key, meta, body)
+        with self._lock:
+            self._sizes[key] = (len(body), time.time())
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            total = sum(size for size, _ in self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._sizes.items(), key=lambda kv: kv[1][1]):
+                if total <= self.max_bytes * 0.9:
+                    break
+                victims.append(key)
+                total -= size
+            for key in victims:
+                del self._sizes[key]
+        for key in victims:
+            for ext in (".json", ".body"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+
+    def _prepare(self, url: str, request_headers: Dict[str, str]) -> Tuple[Optional[Tuple[str, Dict, bytes]], Dict[str, str], bool]:
+        """(cached, headers_to_send, fresh)."""
+        cached = self._load(url)
+        hdrs = dict(request_headers)
+        if cached is None:
+            return None, hdrs, False
+        key, meta, body = cached
+        with self._lock:
+            self._sizes[key] = (len(body), time.time())
+        if time.time() - meta.get("stored", 0) < meta.get("max_age", 0):
+            return cached, hdrs, True
+        if meta["headers"].get("etag"):
+            hdrs["If-None-Match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            hdrs["If-Modified-Since"] = meta["headers"]["last-modified"]
+        return cached, hdrs, False
+
+    def _finish(self, url: str, cached: Optional[Tuple[str, Dict, bytes]], status: int,
+                headers: Dict[str, str], data: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        if status == 304 and cached is not None:
+            key, meta, body = cached
+            merged = dict(meta["headers"])
+            merged.update({k: headers[k] for k in CACHED_HEADERS if headers.get(k)})
+            max_age = self._max_age(merged)
+            meta.update(stored=time.time(), max_age=max_age or 0.0, headers=merged)
+            self._write(key, meta, None)
+            with self._lock:
+                self.stats["revalidated"] += 1
+                self.stats["bytes_saved"] += len(body)
+            return 200, merged, body
+        with self._lock:
+            self.stats["misses"] += 1
+        if status == 200:
+            self._store(url, headers, data)
+        return status, headers, data
+
+    def _hit(self, cached: Tuple[str, Dict, bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        _, meta, body = cached
+        with self._lock:
+            self.stats["fresh"] += 1
+            self.stats["bytes_saved"] += len(body)
+        return 200, dict(meta["headers"]), body
+
+    def fetch(self, url: str, request_headers: Dict[str, str], do_fetch) -> Tuple[int, Dict[str, str], bytes]:
+        """``do_fetch(headers) -> (status, lowercase_headers, body)`` runs only when needed."""
+        cached, hdrs, fresh = self._prepare(url, request_headers)
+        if fresh:
+            return self._hit(cached)
+        status, headers, data = do_fetch(hdrs)
+        return self._finish(url, cached, status, headers, data)
+
+    async def afetch(self, url: str, request_headers: Dict[str, str], do_fetch) -> Tuple[int, Dict[str, str], bytes]:
+        """asyncio variant of fetch; ``do_fetch`` is a coroutine function."""
+        cached, hdrs, fresh = self._prepare(url, request_headers)
+        if fresh:
+            return self._hit(cached)
+        status, headers, data = await do_fetch(hdrs)
+        return self._finish(url, cached, status, headers, data)
+
+    def summary(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+        total = s["fresh"] + s["revalidated"] + s["misses"]
+        rate = 100.0 * (s["fresh"] + s["revalidated"]) / total if total else 0.0
+        return (f"{s['fresh']} fresh hits, {s['revalidated']} revalidated (304), {s['misses']} misses; "
+                f"hit rate {rate:.0f}%, {s['bytes_saved']} bytes not re-downloaded")
+
+HTTP_CACHE: Optional[HTTPCache] = None
+
+def _fetch_page(url: str, timeout: float, hdrs: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+    with http_open(url, timeout=timeout, headers=hdrs) as resp:
+        data = resp.read()
+        return resp.status, {k.lower(): v for k, v in resp.headers.items()}, data
+
 def http_get(url: str, timeout: float = 10.0, headers: Optional[Dict[str,str]] = None, range_bytes: Optional[Tuple[int,int]] = None) -> Tuple[int, bytes, str]:
     """Return (status_code, content_bytes, text_or_empty)."""
-    req = urllib.request.Request(url)
-    for k, v in (headers or HEADERS).items():
-        req.add_header(k, v)
+    hdrs = dict(headers or HEADERS)
     if range_bytes is not None:
         start, end = range_bytes
-        req.add_header("Range", f"bytes={start}-{end}")
+        hdrs["Range"] = f"bytes={start}-{end}"
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-            status = getattr(resp, "status", 200)
-            ct = resp.headers.get_content_charset() or "utf-8"
-            text = ""
-            try:
-                text = data.decode(ct, errors="ignore")
-            except Exception:
-                text = data.decode("utf-8", errors="ignore")
-            return status, data, text
-    except urllib.error.HTTPError as e:
-        try:
-            data = e.read()
-        except Exception:
-            data = b""
-        return e.code, data, data.decode("utf-8", errors="ignore")
+        if HTTP_CACHE is not None and range_bytes is None:
+            status, resp_headers, data = HTTP_CACHE.fetch(url, hdrs, lambda h: _fetch_page(url, timeout, h))
+        else:
+            status, resp_headers, data = _fetch_page(url, timeout, hdrs)
+        return status, data, decode_body(data, resp_headers.get("content-type", ""))
     except Exception as e:
         print(f"[WARN] GET failed {url}: {e}", file=sys.stderr)
         return 0, b"", ""
 
+TVARRAY_START_RE = re.compile(r'tvChannelArray\s*=\s*(?:JSON\.parse\(`\s*)?\[')
+JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\]`]')
+
+def iter_tv_channels(html_text: str) -> Iterator[Dict]:
+    """Yield tvChannelArray entries one object at a time.
+
+    Object boundaries are found by brace depth (skipping JSON strings), and
+    each object is html-unescaped and parsed on its own, so the whole array
+    is never copied or unescaped in one piece.
+    """
+    m = TVARRAY_START_RE.search(html_text)
+    if not m:
+        raise RuntimeError("Could not find tvChannelArray JSON on homepage")
+    depth = 0
+    start = 0
+    for tok in JSON_TOKEN_RE.finditer(html_text, m.end()):
+        t = tok.group(0)
+        if t == "{":
+            if depth == 0:
+                start = tok.start()
+            depth += 1
+        elif t == "}":
+            depth -= 1
+            if depth == 0:
+                yield json.loads(html.unescape(html_text[start:tok.end()]))
+            elif depth < 0:
+                raise ValueError("unbalanced '}' in tvChannelArray")
+        elif depth == 0 and t in ("]", "`"):
+            return
+    # Braces inside entity-escaped strings can keep depth from ever returning to 0
+    raise ValueError("tvChannelArray ended before its closing bracket")
+
 def extract_tv_channel_array(html_text: str) -> List[Dict]:
-    m = TVARRAY_PARSE_RE_1.search(html_text)
+    try:
+        return list(iter_tv_channels(html_text))
+    except ValueError:
+        pass
+    # Unusual layout (e.g. braces inside entity-escaped strings): parse the blob in one go
+    m = TVARRAY_PARSE_RE_1.search(html_text) or TVARRAY_PARSE_RE_2.search(html_text)
     if not m:
-        m = TVARRAY_PARSE_RE_2.search(html_text)
-        if not m:
-            raise RuntimeError("Could not find tvChannelArray JSON on homepage")
-        json_text = m.group(1)
-    else:
-        json_text = m.group(1)
-    json_text = html.unescape(json_text)
-    return json.loads(json_text)
+        raise RuntimeError("Could not find tvChannelArray JSON on homepage")
+    return json.loads(html.unescape(m.group(1)))
+
+SCAN_CHUNK = 16384
+SCAN_OVERLAP = 2048
+
+class CandidateScanner:
+    """Incremental M3U8_RE/SRC_RE scan of a page as its chunks arrive.
+
+    Each chunk is scanned together with the tail of the previous one, and a
+    match is only accepted once at least SCAN_OVERLAP characters follow it
+    (or the page has ended), so URLs split across chunks are still found
+    whole. ``feed`` returns the m3u8 URLs seen for the first time.
+    """
+
+    def __init__(self, page_url: str, content_type: str = ""):
+        self.page_url = page_url
+        self.m3u8s: Set[str] = set()
+        self.srcs: Set[str] = set()
+        self.received = 0
+        self._decoder = codecs.getincrementaldecoder(charset_of(content_type))(errors="ignore")
+        self._tail = ""
+
+    def feed(self, data: bytes, final: bool = False) -> List[str]:
+        self.received += len(data)
+        return self.feed_text(self._decoder.decode(data, final), final)
+
+    def feed_text(self, text: str, final: bool = False) -> List[str]:
+        buf = self._tail + text
+        limit = len(buf) if final else len(buf) - SCAN_OVERLAP
+        keep_from = max(0, limit)
+        new: List[str] = []
+        for m in M3U8_RE.finditer(buf):
+            if m.end() > limit:
+                keep_from = min(keep_from, m.start())
+                break
+            if m.group(0) not in self.m3u8s:
+                self.m3u8s.add(m.group(0))
+                new.append(m.group(0))
+        for m in SRC_RE.finditer(buf):
+            if m.end() > limit:
+                keep_from = min(keep_from, m.start())
+                break
+            self.srcs.add(absolutize(self.page_url, m.group(1)))
+        self._tail = "" if final else buf[keep_from:]
+        return new
+
+    def enough(self, max_candidates: int) -> bool:
+        return max_candidates > 0 and len(self.m3u8s) >= max_candidates
 
 def scrape_candidates(token_url: str, html_text: str) -> Tuple[Set[str], Set[str]]:
-    m3u8s = set(M3U8_RE.findall(html_text) or [])
-    child_srcs = set()
-    for src in SRC_RE.findall(html_text):
-        child_srcs.add(absolutize(token_url, src))
-    return m3u8s, child_srcs
+    scanner = CandidateScanner(token_url)
+    scanner.feed_text(html_text, final=True)
+    return scanner.m3u8s, scanner.srcs
+
+def stream_candidates(url: str, timeout: float, max_candidates: int = 0,
+                      on_m3u8=None) -> Tuple[int, CandidateScanner]:
+    """Fetch a token page through a CandidateScanner, handing each new m3u8 URL to
+    ``on_m3u8`` as soon as it is scanned; reading stops once ``max_candidates``
+    (if > 0) are found. With the HTTP cache enabled the page goes through
+    http_get so revalidation still applies.
+    """
+    if HTTP_CACHE is not None:
+        status, data, _ = http_get(url, timeout=timeout)
+        scanner = CandidateScanner(url)
+        if status == 200:
+            for u in scanner.feed(data, final=True):
+                if on_m3u8:
+                    on_m3u8(u)
+        return status, scanner
+
+    scanner = CandidateScanner(url)
+    try:
+        with http_open(url, timeout=timeout, headers=HEADERS) as resp:
+            status = resp.status
+            if status != 200:
+                return status, scanner
+            scanner = CandidateScanner(url, resp.headers.get("Content-Type", ""))
+            while True:
+                chunk = resp.read1(SCAN_CHUNK)
+                for u in scanner.feed(chunk, final=not chunk):
+                    if on_m3u8:
+                        on_m3u8(u)
+                if not chunk or scanner.enough(max_candidates):
+                    break
+    except Exception as e:
+        print(f"[WARN] GET failed {url}: {e}", file=sys.stderr)
+        return 0, scanner
+    return status, scanner
+
+VALIDATE_MAX_BYTES = 8192
+PROBE_CHUNK = 2048
+MASTER_TAGS = ("#EXT-X-STREAM-INF", "#EXT-X-I-FRAME-STREAM-INF")
+MEDIA_TAGS = ("#EXTINF", "#EXT-X-TARGETDURATION", "#EXT-X-MEDIA-SEQUENCE")
+
+def classify_playlist(text: str) -> Optional[str]:
+    """'master', 'media', 'hls' (signature only so far) or None (no #EXTM3U)."""
+    if "#EXTM3U" not in text:
+        return None
+    if any(tag in text for tag in MASTER_TAGS):
+        return "master"
+    if any(tag in text for tag in MEDIA_TAGS):
+        return "media"
+    return "hls"
+
+class PlaylistSniffer:
+    """Incremental playlist detector with a hard byte cap.
+
+    ``feed`` returns True once the playlist type is known or the cap is hit,
+    telling the caller to stop reading.
+    """
+
+    def __init__(self, max_bytes: int = VALIDATE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.buf = bytearray()
+        self.received = 0
+        self.kind: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        self.received += len(chunk)
+        self.buf += chunk[:max(0, self.max_bytes - len(self.buf))]
+        self.kind = classify_playlist(self.buf.decode("utf-8", errors="ignore"))
+        return self.kind in ("master", "media") or len(self.buf) >= self.max_bytes
+
+    def result(self, status: int) -> Dict:
+        return {"ok": self.kind is not None, "kind": self.kind or "non_hls", "bytes": self.received, "status": status}
+
+def probe_m3u8(url: str, timeout: float = 10.0, max_bytes: int = VALIDATE_MAX_BYTES) -> Dict:
+    """Stream at most ``max_bytes`` of ``url`` and classify it.
+
+    Returns {ok, kind, bytes, status}; kind is master/media/hls/non_hls, or
+    http_error/error when the fetch itself failed.
+    """
+    total = 0
+    for range_bytes in ((0, max_bytes - 1), None):
+        hdrs = dict(HEADERS)
+        if range_bytes is not None:
+            hdrs["Range"] = f"bytes={range_bytes[0]}-{range_bytes[1]}"
+        sniffer = PlaylistSniffer(max_bytes)
+        try:
+            with http_open(url, timeout=timeout, headers=hdrs) as resp:
+                status = resp.status
+                if status >= 400:
+                    return {"ok": False, "kind": "http_error", "bytes": total, "status": status}
+                while True:
+                    chunk = resp.read(PROBE_CHUNK)
+                    if not chunk or sniffer.feed(chunk):
+                        break
+        except Exception as e:
+            print(f"[WARN] GET failed {url}: {e}", file=sys.stderr)
+            return {"ok": False, "kind": "error", "bytes": total + sniffer.received, "status": 0}
+        total += sniffer.received
+        # If server ignored range and returned nothing, try small non-range get
+        if sniffer.received:
+            break
+    res = sniffer.result(status)
+    res["bytes"] = total
+    return res
 
 def validate_m3u8(url: str, timeout: float = 10.0) -> bool:
-    status, data, _ = http_get(url, timeout=timeout, range_bytes=(0, 8191))
-    if status and status >= 400:
-        return False
-    # If server ignored range and returned nothing, try small non-range get
-    if not data:
-        status2, data2, _ = http_get(url, timeout=timeout)
-        if status2 and status2 >= 400:
-            return False
-        data = data2
+    return probe_m3u8(url, timeout)["ok"]
+
+PLAYLIST_MAX_BYTES = 256 * 1024
+SEGMENT_SAMPLE_BYTES = 512 * 1024
+RANK_FIELDS = ["ttfb_ms", "kbps", "backups"]
+
+def next_hop(text: str, base_url: str) -> Tuple[Optional[str], Optional[str]]:
+    """(kind, url) to follow when measuring: first variant of a master, newest segment of a media playlist."""
+    kind = classify_playlist(text)
+    uris = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    if not uris:
+        return kind, None
+    return kind, absolutize(base_url, uris[0] if kind == "master" else uris[-1])
+
+def timed_get(url: str, timeout: float, max_bytes: int) -> Tuple[int, bytes, float, float]:
+    """(status, body, ttfb_seconds, elapsed_seconds), reading at most ``max_bytes``.
+
+    Both times start once the governor slot is held, so queueing behind other
+    requests to the same host does not count against the candidate.
+    """
+    ttfb = elapsed = 0.0
+    parts: List[bytes] = []
+    n = 0
+    status = 0
     try:
-        text = (data or b"").decode("utf-8", errors="ignore")
-    except Exception:
-        text = ""
-    return "#EXTM3U" in text
+        with http_open(url, timeout=timeout, headers=HEADERS) as resp:
+            opened = time.monotonic()
+            status = resp.status
+            ttfb = resp.latency
+            while n < max_bytes:
+                chunk = resp.read(min(16384, max_bytes - n))
+                if not chunk:
+                    break
+                parts.append(chunk)
+                n += len(chunk)
+            elapsed = ttfb + time.monotonic() - opened
+    except Exception as e:
+        print(f"[WARN] GET failed {url}: {e}", file=sys.stderr)
+    return status, b"".join(parts), ttfb, elapsed
+
+def measure_candidate(url: str, timeout: float) -> Dict:
+    """Time to first byte of the playlist and throughput of one segment."""
+    status, body, ttfb, _ = timed_get(url, timeout, PLAYLIST_MAX_BYTES)
+    metrics = {"ttfb_ms": round(ttfb * 1000), "kbps": 0.0}
+    if not status or status >= 400:
+        return metrics
+    kind, nxt = next_hop(body.decode("utf-8", errors="ignore"), url)
+    if kind == "master" and nxt:
+        status, body, _, _ = timed_get(nxt, timeout, PLAYLIST_MAX_BYTES)
+        if not status or status >= 400:
+            return metrics
+        kind, nxt = next_hop(body.decode("utf-8", errors="ignore"), nxt)
+    if kind == "media" and nxt:
+        status, seg, _, elapsed = timed_get(nxt, timeout, SEGMENT_SAMPLE_BYTES)
+        if status and status < 400 and elapsed > 0:
+            metrics["kbps"] = round(len(seg) * 8 / 1000 / elapsed, 1)
+    return metrics
+
+def ranked_result(name: str, measured: List[Tuple[str, Dict]]) -> Dict[str, str]:
+    """Fastest segment throughput wins (ties: lower TTFB); the rest become ordered backups."""
+    measured.sort(key=lambda um: (-um[1]["kbps"], um[1]["ttfb_ms"]))
+    best_url, best = measured[0]
+    print(f"   - rank {name}: {best_url} ({best['kbps']:.0f} kbps, ttfb {best['ttfb_ms']} ms)")
+    return {"channel": name, "m3u8": best_url, "status": "ok", "ttfb_ms": best["ttfb_ms"],
+            "kbps": best["kbps"], "backups": " ".join(u for u, _ in measured[1:])}
+
+class CrawlFrontier:
+    """Run-wide set of child URLs already claimed by some channel (thread-safe)."""
+
+    def __init__(self):
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def claim(self, urls: Set[str], limit: int) -> List[str]:
+        """Claim up to ``limit`` not-yet-seen URLs for the caller."""
+        claimed: List[str] = []
+        with self._lock:
+            for u in urls:
+                if u not in self._seen:
+                    self._seen.add(u)
+                    claimed.append(u)
+                if len(claimed) >= limit:
+                    break
+        return claimed
+
+PROBE_FAILED = {"ok": False, "kind": "error", "bytes": 0, "status": 0}
+
+class ValidationMemo:
+    """Run-wide memo of probe_m3u8 results keyed by URL.
+
+    Concurrent callers for the same URL share one in-flight validation (a
+    threading.Event for the thread engine, a shielded task for asyncio).
+    Results expire after ``ttl`` seconds and can be saved to / loaded from a
+    JSON file so they carry across runs. Transport failures (``kind ==
+    "error"``) are shared with in-flight joiners but never remembered, so a
+    network blip does not mark a good URL bad.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results: Dict[str, Tuple[Dict, float]] = {}
+        self._inflight: Dict[str, list] = {}
+        self._tasks: Dict[str, list] = {}
+        self.stats = {"validated": 0, "hits": 0, "joined": 0, "bytes": 0}
+
+    def _cached(self, url: str) -> Optional[Dict]:
+        hit = self._results.get(url)
+        if hit is not None and time.time() - hit[1] < self.ttl:
+            self.stats["hits"] += 1
+            return hit[0]
+        return None
+
+    def _store(self, url: str, result: Dict):
+        if result.get("kind") != "error":
+            self._results[url] = (result, time.time())
+        self.stats["validated"] += 1
+        self.stats["bytes"] += result.get("bytes", 0)
+
+    def validate(self, url: str, fn) -> Dict:
+        with self._lock:
+            cached = self._cached(url)
+            if cached is not None:
+                return cached
+            entry = self._inflight.get(url)
+            owner = entry is None
+            if owner:
+                entry = self._inflight[url] = [threading.Event(), PROBE_FAILED]
+            else:
+                self.stats["joined"] += 1
+
+        event = entry[0]
+        if not owner:
+            event.wait()
+            return entry[1]
+
+        result = PROBE_FAILED
+        try:
+            result = fn()
+        finally:
+            with self._lock:
+                self._store(url, result)
+                entry[1] = result
+                del self._inflight[url]
+            event.set()
+        return result
+
+    async def avalidate(self, url: str, factory) -> Dict:
+        """asyncio variant; the shared task is cancelled once no caller waits on it."""
+        while True:
+            cached = self._cached(url)
+            if cached is not None:
+                return cached
+            entry = self._tasks.get(url)
+            if entry is None:
+                task = asyncio.ensure_future(factory())
+                entry = self._tasks[url] = [task, 0]
+
+                def done(t: asyncio.Task, url: str = url, entry: List = entry):
+                    if self._tasks.get(url) is entry:
+                        del self._tasks[url]
+                    if not t.cancelled() and t.exception() is None:
+                        self._store(url, t.result())
+                task.add_done_callback(done)
+            else:
+                self.stats["joined"] += 1
+
+            entry[1] += 1
+            try:
+                return await asyncio.shield(entry[0])
+            except asyncio.CancelledError:
+                # The shared probe was cancelled under us (its last waiter left), not this caller: probe afresh
+                if not entry[0].cancelled() or asyncio.current_task().cancelling():
+                    raise
+            finally:
+                entry[1] -= 1
+                if entry[1] == 0 and not entry[0].done():
+                    entry[0].cancel()
+                    # Later callers must not join a task that is on its way out
+                    if self._tasks.get(url) is entry:
+                        del self._tasks[url]
+
+    def load(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring validation cache {path}: {e}", file=sys.stderr)
+            return
+        now = time.time()
+        with self._lock:
+            for url, (result, ts) in data.items():
+                if now - ts < self.ttl and isinstance(result, dict) and result.get("kind") != "error":
+                    self._results[url] = (result, float(ts))
+
+    def save(self, path: str):
+        now = time.time()
+        with self._lock:
+            data = {u: [result, ts] for u, (result, ts) in self._results.items() if now - ts < self.ttl}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['validated']} validated ({s['bytes']} bytes read), {s['hits']} memo hits, "
+                f"{s['joined']} joined in-flight")
+
+def load_previous_results(path: str) -> Dict[str, Dict[str, str]]:
+    """Rows of an earlier CSV dump that had a working URL, keyed by channel."""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    except FileNotFoundError:
+        return {}
+    except (OSError, csv.Error) as e:
+        print(f"[WARN] Ignoring previous results {path}: {e}", file=sys.stderr)
+        return {}
+    return {r["channel"]: r for r in rows if r.get("status") == "ok" and r.get("m3u8") and r.get("channel")}
+
+def recheck_previous(name: str, row: Dict[str, str], timeout: float, memo: ValidationMemo) -> Optional[Dict[str, str]]:
+    """Re-probe the channel's last known-good URL; the old row if it still plays, else None."""
+    url = row["m3u8"]
+    if memo.validate(url, lambda: probe_m3u8(url, timeout))["ok"]:
+        return dict(row, channel=name)
+    return None
 
 def fetch_child_html(url: str, timeout: float) -> str:
     status, _, text = http_get(url, timeout=timeout)
     return text if status == 200 and text else ""
 
-def process_channel(base: str, name: str, timeout: float, exec_children: ThreadPoolExecutor, visited: Set[str]) -> Dict[str, str]:
+def settled_ok(futs) -> bool:
+    """True if any finished validation future already reported a playable URL."""
+    return any(f.done() and not f.cancelled() and f.exception() is None and f.result()["ok"] for f in futs)
+
+def process_channel(base: str, name: str, timeout: float, exec_children: ThreadPoolExecutor, frontier: CrawlFrontier,
+                    memo: ValidationMemo, rank: bool = False, max_candidates: int = 0) -> Dict[str, str]:
     qs = urllib.parse.quote(name, safe="")
     tok_url = f"{base}/token.php?stream={qs}"
-    status, _, text = http_get(tok_url, timeout=timeout)
-    if status != 200 or not text:
-        return {"channel": name, "m3u8": "", "status": "token_fetch_failed"}
 
-    m3u8s, child_srcs = scrape_candidates(tok_url, text)
+    with ThreadPoolExecutor(max_workers=8) as validator_pool:
+        vfuts = {}
 
-    # Fetch limited number of child pages concurrently
-    child_srcs_limited = []
-    for u in child_srcs:
-        if u not in visited:
-            visited.add(u)
-            child_srcs_limited.append(u)
-        if len(child_srcs_limited) >= 40:
-            break
+        def submit(u: str):
+            # Validation starts while the rest of the page is still downloading
+            vfuts[validator_pool.submit(memo.validate, u, lambda u=u: probe_m3u8(u, timeout))] = u
 
-    futures = {exec_children.submit(fetch_child_html, u, timeout): u for u in child_srcs_limited}
-    for fut in as_completed(futures):
-        html_text = fut.result()
-        if html_text:
-            m3u8s.update(M3U8_RE.findall(html_text) or [])
+        status, scanner = stream_candidates(tok_url, timeout, max_candidates, submit)
+        if status != 200 or not scanner.received:
+            for vf in vfuts:
+                vf.cancel()
+            return {"channel": name, "m3u8": "", "status": "token_fetch_failed"}
+        m3u8s = scanner.m3u8s
 
-    if not m3u8s:
-        return {"channel": name, "m3u8": "", "status": "no_m3u8_found"}
+        # Fetch limited number of child pages concurrently, unless the token page already settled it
+        if not scanner.enough(max_candidates) and not (not rank and settled_ok(vfuts)):
+            child_srcs_limited = frontier.claim(scanner.srcs, 40)
+            futures = {exec_children.submit(fetch_child_html, u, timeout): u for u in child_srcs_limited}
+            for fut in as_completed(futures):
+                html_text = fut.result()
+                for u in M3U8_RE.findall(html_text or ""):
+                    if u not in m3u8s:
+                        m3u8s.add(u)
+                        submit(u)
 
-    # Validate candidates concurrently and short-circuit on first OK
-    with ThreadPoolExecutor(max_workers=8) as validator_pool:
-        vfuts = {validator_pool.submit(validate_m3u8, u, timeout): u for u in list(m3u8s)}
+        if not m3u8s:
+            return {"channel": name, "m3u8": "", "status": "no_m3u8_found"}
+
+        if rank:
+            # Validate every candidate, then measure the valid ones one at a time
+            valid = []
+            for vf in as_completed(vfuts):
+                try:
+                    res = vf.result()
+                except Exception:
+                    res = PROBE_FAILED
+                u = vfuts[vf]
+                print(f"   - check {name}: {u} -> {'OK' if res['ok'] else 'BAD'} ({res['kind']}, {res['bytes']} B)")
+                if res["ok"]:
+                    valid.append(u)
+            if not valid:
+                return {"channel": name, "m3u8": next(iter(m3u8s)), "status": "none_valid"}
+            return ranked_result(name, [(u, measure_candidate(u, timeout)) for u in sorted(valid)])
+
+        # Short-circuit on first OK
         winner = None
         for vf in as_completed(vfuts):
-            ok = False
             try:
-                ok = vf.result()
+                res = vf.result()
             except Exception:
-                ok = False
+                res = PROBE_FAILED
+            ok = res["ok"]
             u = vfuts[vf]
-            print(f"   - check {name}: {u} -> {'OK' if ok else 'BAD'}")
+            print(f"   - check {name}: {u} -> {'OK' if ok else 'BAD'} ({res['kind']}, {res['bytes']} B)")
             if ok:
                 winner = u
                 break
@@ -169,14 +1094,485 @@ def process_channel(base: str, name: str, timeout: float, exec_children: ThreadP
     else:
         return {"channel": name, "m3u8": next(iter(m3u8s)), "status": "none_valid"}
 
+class AsyncHTTPClient:
+    """Minimal asyncio HTTP/1.1 GET client with per-host keep-alive reuse.
+
+    Requests are bounded by one global semaphore, one semaphore per host and
+    the adaptive per-host limits of ``governor``. Cancelling a task mid-request closes its socket, so losing validations
+    actually stop instead of running to completion in a worker thread.
+    """
+
+    def __init__(self, max_requests: int = 64, per_host: int = 16, pool_size: int = 8, idle_timeout: float = 30.0,
+                 cache: Optional[HTTPCache] = None, governor: Optional[HostGovernor] = None):
+        self.cache = cache
+        self.governor = governor or GOVERNOR
+        self.global_sem = asyncio.Semaphore(max_requests)
+        self.per_host = per_host
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._host_sems: Dict[str, asyncio.Semaphore] = {}
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]] = {}
+        self._ssl = ssl.create_default_context()
+        self.stats = {"requests": 0, "new": 0, "reused": 0, "cancelled": 0}
+
+    def _host_sem(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def _connect(self, key: Tuple[str, str, int]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        now = time.monotonic()
+        idle = self._idle.get(key) or []
+        while idle:
+            reader, writer, last_used = idle.pop()
+            if now - last_used <= self.idle_timeout and not reader.at_eof() and not writer.is_closing():
+                self.stats["reused"] += 1
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None)
+        self.stats["new"] += 1
+        return reader, writer, False
+
+    def _release(self, key: Tuple[str, str, int], reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.pool_size:
+            idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        status_line = (await reader.readline()).decode("latin-1").strip()
+        if not status_line.startswith("HTTP/"):
+            raise http.client.BadStatusLine(status_line)
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            k, _, v = line.partition(":")
+            headers[k.strip().lower()] = v.strip()
+        return status, headers
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, status: int, headers: Dict[str, str],
+                         max_bytes: Optional[int], on_chunk=None) -> Tuple[bytes, bool]:
+        """Return (body, connection_reusable).
+
+        Reading stops early once ``max_bytes`` are read or ``on_chunk(chunk)``
+        returns True; an early stop leaves the connection unusable.
+        """
+        if status in (204, 304) or 100 <= status < 200:
+            return b"", True
+        parts: List[bytes] = []
+        total = 0
+
+        def take(chunk: bytes) -> bool:
+            nonlocal total
+            if max_bytes is not None:
+                chunk = chunk[:max_bytes - total]
+            parts.append(chunk)
+            total += len(chunk)
+            stop = bool(on_chunk(chunk)) if on_chunk else False
+            return stop or (max_bytes is not None and total >= max_bytes)
+
+        async def take_exactly(n: int) -> bool:
+            while n:
+                piece = await reader.read(min(n, 16384))
+                if not piece:
+                    raise asyncio.IncompleteReadError(b"", n)
+                n -= len(piece)
+                if take(piece):
+                    return True
+            return False
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(parts), True
+                if await take_exactly(size):
+                    return b"".join(parts), False
+                await reader.readline()
+        length = headers.get("content-length")
+        if length is not None and length.isdigit():
+            n = int(length)
+            while n:
+                piece = await reader.read(min(n, 16384))
+                if not piece:
+                    raise asyncio.IncompleteReadError(b"", n)
+                n -= len(piece)
+                if take(piece):
+                    return b"".join(parts), n == 0
+            return b"".join(parts), True
+        while True:
+            piece = await reader.read(16384)
+            if not piece or take(piece):
+                return b"".join(parts), False
+
+    async def _get_once(self, url: str, headers: Dict[str, str], timeout: float, max_bytes: Optional[int],
+                        on_chunk=None, timing: Optional[Dict[str, float]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """One request/response. Queueing for the governor and semaphores is not
+        timed; ``timeout`` covers only connecting, sending and reading.
+
+        ``timing`` receives ``ttfb`` and ``elapsed`` seconds, both measured from
+        when the slots were held.
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+        head = [f"GET {path} HTTP/1.1", f"Host: {host_header}", "Accept-Encoding: identity"]
+        head += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in ("host", "accept-encoding")]
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1", errors="ignore")
+
+        await self.governor.aacquire(parts.hostname)
+        latency, outcome = 0.0, None  # cancelled while queued: no signal about the host
+        try:
+            async with self.global_sem, self._host_sem(parts.hostname):
+                self.stats["requests"] += 1
+                t0 = time.monotonic()
+                try:
+                    status, resp_headers, body, latency = await asyncio.wait_for(
+                        self._exchange(key, request, t0, max_bytes, on_chunk), timeout)
+                except asyncio.CancelledError:
+                    raise  # losing validations are no signal
+                except Exception:
+                    # Failed or timed out on the wire
+                    latency, outcome = time.monotonic() - t0, False
+                    raise
+                outcome = HostGovernor.healthy(status)
+                if timing is not None:
+                    timing.update(ttfb=latency, elapsed=time.monotonic() - t0)
+                return status, resp_headers, body
+        finally:
+            self.governor.release(parts.hostname, latency, outcome)
+
+    async def _exchange(self, key: Tuple[str, str, int], request: bytes, t0: float, max_bytes: Optional[int],
+                        on_chunk) -> Tuple[int, Dict[str, str], bytes, float]:
+        """Send ``request`` on a pooled connection; returns the response plus time to its head."""
+        for attempt in range(2):
+            reader, writer, reused = await self._connect(key)
+            reusable = False
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, resp_headers = await self._read_head(reader)
+                latency = time.monotonic() - t0
+                body, reusable = await self._read_body(
+                    reader, status, resp_headers, max_bytes,
+                    None if status in REDIRECT_CODES else on_chunk)
+                reusable = reusable and resp_headers.get("connection", "").lower() != "close"
+                return status, resp_headers, body, latency
+            except (ConnectionError, asyncio.IncompleteReadError, http.client.BadStatusLine):
+                # A reused keep-alive socket may have been closed by the server; retry once fresh
+                if not reused or attempt:
+                    raise
+            except asyncio.CancelledError:
+                self.stats["cancelled"] += 1
+                raise
+            finally:
+                if reusable:
+                    self._release(key, reader, writer)
+                else:
+                    writer.close()
+        raise http.client.HTTPException(f"no response from {key[1]}")
+
+    async def get(self, url: str, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None,
+                  range_bytes: Optional[Tuple[int, int]] = None, max_bytes: Optional[int] = None,
+                  on_chunk=None, timing: Optional[Dict[str, float]] = None) -> Tuple[int, bytes, str]:
+        """Async counterpart of http_get: (status_code, content_bytes, text_or_empty).
+
+        ``timing`` (uncached requests only) receives the final hop's ``ttfb`` and
+        ``elapsed`` seconds, excluding time spent waiting for a slot.
+        """
+        hdrs = dict(headers or HEADERS)
+        if range_bytes is not None:
+            hdrs["Range"] = f"bytes={range_bytes[0]}-{range_bytes[1]}"
+        try:
+            if self.cache is not None and range_bytes is None and max_bytes is None and on_chunk is None:
+                status, resp_headers, data = await self.cache.afetch(
+                    url, hdrs, lambda h: self._follow(url, h, timeout, None, None))
+            else:
+                status, resp_headers, data = await self._follow(url, hdrs, timeout, max_bytes, on_chunk, timing)
+            return status, data, decode_body(data, resp_headers.get("content-type", ""))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WARN] GET failed {url}: {str(e) or type(e).__name__}", file=sys.stderr)
+            return 0, b"", ""
+
+    async def _follow(self, url: str, hdrs: Dict[str, str], timeout: float, max_bytes: Optional[int],
+                      on_chunk, timing: Optional[Dict[str, float]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, resp_headers, data = await self._get_once(url, hdrs, timeout, max_bytes, on_chunk, timing)
+            location = resp_headers.get("location")
+            if status in REDIRECT_CODES and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return status, resp_headers, data
+        raise http.client.HTTPException(f"too many redirects: {url}")
+
+    def close_all(self):
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for _, writer, _ in conns:
+                writer.close()
+
+    def summary(self) -> str:
+        s = self.stats
+        opened = s["new"] + s["reused"]
+        reuse = 100.0 * s["reused"] / opened if opened else 0.0
+        return (f"{s['requests']} requests, {s['new']} new connections, {s['reused']} reused ({reuse:.0f}%), "
+                f"{s['cancelled']} cancelled")
+
+async def async_probe_m3u8(client: AsyncHTTPClient, url: str, timeout: float = 10.0,
+                          max_bytes: int = VALIDATE_MAX_BYTES) -> Dict:
+    """asyncio counterpart of probe_m3u8."""
+    total = 0
+    for range_bytes in ((0, max_bytes - 1), None):
+        sniffer = PlaylistSniffer(max_bytes)
+        status, _, _ = await client.get(url, timeout=timeout, range_bytes=range_bytes,
+                                        max_bytes=max_bytes, on_chunk=sniffer.feed)
+        total += sniffer.received
+        if status >= 400:
+            return {"ok": False, "kind": "http_error", "bytes": total, "status": status}
+        if status == 0:
+            return {"ok": False, "kind": "error", "bytes": total, "status": 0}
+        # If server ignored range and returned nothing, try small non-range get
+        if sniffer.received:
+            break
+    res = sniffer.result(status)
+    res["bytes"] = total
+    return res
+
+async def async_validate_m3u8(client: AsyncHTTPClient, url: str, timeout: float = 10.0) -> bool:
+    return (await async_probe_m3u8(client, url, timeout))["ok"]
+
+async def async_timed_get(client: AsyncHTTPClient, url: str, timeout: float, max_bytes: int) -> Tuple[int, bytes, float, float]:
+    """asyncio counterpart of timed_get."""
+    timing: Dict[str, float] = {}
+    status, body, _ = await client.get(url, timeout=timeout, max_bytes=max_bytes, timing=timing)
+    return status, body, timing.get("ttfb", 0.0), timing.get("elapsed", 0.0)
+
+async def async_measure_candidate(client: AsyncHTTPClient, url: str, timeout: float) -> Dict:
+    """asyncio counterpart of measure_candidate."""
+    status, body, ttfb, _ = await async_timed_get(client, url, timeout, PLAYLIST_MAX_BYTES)
+    metrics = {"ttfb_ms": round(ttfb * 1000), "kbps": 0.0}
+    if not status or status >= 400:
+        return metrics
+    kind, nxt = next_hop(body.decode("utf-8", errors="ignore"), url)
+    if kind == "master" and nxt:
+        status, body, _, _ = await async_timed_get(client, nxt, timeout, PLAYLIST_MAX_BYTES)
+        if not status or status >= 400:
+            return metrics
+        kind, nxt = next_hop(body.decode("utf-8", errors="ignore"), nxt)
+    if kind == "media" and nxt:
+        status, seg, _, elapsed = await async_timed_get(client, nxt, timeout, SEGMENT_SAMPLE_BYTES)
+        if status and status < 400 and elapsed > 0:
+            metrics["kbps"] = round(len(seg) * 8 / 1000 / elapsed, 1)
+    return metrics
+
+async def async_fetch_child_html(client: AsyncHTTPClient, url: str, timeout: float) -> str:
+    status, _, text = await client.get(url, timeout=timeout)
+    return text if status == 200 and text else ""
+
+async def async_recheck_previous(client: AsyncHTTPClient, name: str, row: Dict[str, str], timeout: float,
+                                 memo: ValidationMemo) -> Optional[Dict[str, str]]:
+    url = row["m3u8"]
+    if (await memo.avalidate(url, lambda: async_probe_m3u8(client, url, timeout)))["ok"]:
+        return dict(row, channel=name)
+    return None
+
+async def async_stream_candidates(client: AsyncHTTPClient, url: str, timeout: float, max_candidates: int = 0,
+                                  on_m3u8=None) -> Tuple[int, CandidateScanner]:
+    """asyncio counterpart of stream_candidates, scanning each chunk as the client reads it."""
+    scanner = CandidateScanner(url)
+
+    def take(chunk: bytes) -> bool:
+        for u in scanner.feed(chunk):
+            if on_m3u8:
+                on_m3u8(u)
+        return scanner.enough(max_candidates)
+
+    if client.cache is not None:
+        # Keep token pages on the revalidating cache path, as stream_candidates does
+        status, data, _ = await client.get(url, timeout=timeout)
+        if status == 200:
+            take(data)
+    else:
+        status, _, _ = await client.get(url, timeout=timeout, on_chunk=take)
+    for u in scanner.feed(b"", final=True):
+        if on_m3u8:
+            on_m3u8(u)
+    return status, scanner
+
+async def async_process_channel(client: AsyncHTTPClient, base: str, name: str, timeout: float, frontier: CrawlFrontier,
+                                memo: ValidationMemo, rank: bool = False, max_candidates: int = 0) -> Dict[str, str]:
+    qs = urllib.parse.quote(name, safe="")
+    tok_url = f"{base}/token.php?stream={qs}"
+    tasks: Dict[asyncio.Future, str] = {}
+
+    def submit(u: str):
+        # Validation starts while the rest of the page is still downloading
+        tasks[asyncio.ensure_future(memo.avalidate(u, lambda u=u: async_probe_m3u8(client, u, timeout)))] = u
+
+    winner = None
+    try:
+        status, scanner = await async_stream_candidates(client, tok_url, timeout, max_candidates, submit)
+        if status != 200 or not scanner.received:
+            return {"channel": name, "m3u8": "", "status": "token_fetch_failed"}
+        m3u8s = scanner.m3u8s
+
+        if not scanner.enough(max_candidates) and not (not rank and settled_ok(tasks)):
+            child_srcs_limited = frontier.claim(scanner.srcs, 40)
+            for html_text in await asyncio.gather(*(async_fetch_child_html(client, u, timeout) for u in child_srcs_limited)):
+                for u in M3U8_RE.findall(html_text or ""):
+                    if u not in m3u8s:
+                        m3u8s.add(u)
+                        submit(u)
+
+        if not m3u8s:
+            return {"channel": name, "m3u8": "", "status": "no_m3u8_found"}
+
+        if rank:
+            # Validate every candidate, then measure the valid ones one at a time
+            urls = list(tasks.values())
+            results = await asyncio.gather(*tasks)
+            valid = []
+            for u, res in zip(urls, results):
+                print(f"   - check {name}: {u} -> {'OK' if res['ok'] else 'BAD'} ({res['kind']}, {res['bytes']} B)")
+                if res["ok"]:
+                    valid.append(u)
+            if not valid:
+                return {"channel": name, "m3u8": next(iter(m3u8s)), "status": "none_valid"}
+            return ranked_result(name, [(u, await async_measure_candidate(client, u, timeout)) for u in sorted(valid)])
+
+        # Race validations; once a winner is found the losers are cancelled for real
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                res = t.result() if not t.cancelled() and t.exception() is None else PROBE_FAILED
+                ok = res["ok"]
+                u = tasks[t]
+                print(f"   - check {name}: {u} -> {'OK' if ok else 'BAD'} ({res['kind']}, {res['bytes']} B)")
+                if ok and winner is None:
+                    winner = u
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if winner:
+        return {"channel": name, "m3u8": winner, "status": "ok"}
+    else:
+        return {"channel": name, "m3u8": next(iter(m3u8s)), "status": "none_valid"}
+
+async def run_channels_async(base: str, names: List[str], args: argparse.Namespace, memo: ValidationMemo,
+                             previous: Dict[str, Dict[str, str]]) -> Tuple[List[Dict[str, str]], str, int]:
+    client = AsyncHTTPClient(max_requests=args.max_requests, per_host=args.per_host,
+                             pool_size=args.pool_size, idle_timeout=args.idle_timeout, cache=HTTP_CACHE)
+    channel_sem = asyncio.Semaphore(args.concurrency)
+    frontier = CrawlFrontier()
+    fast = []
+
+    async def one(n: str) -> Dict[str, str]:
+        async with channel_sem:
+            try:
+                if n in previous:
+                    kept = await async_recheck_previous(client, n, previous[n], args.timeout, memo)
+                    if kept is not None:
+                        fast.append(n)
+                        return kept
+                return await async_process_channel(client, base, n, args.timeout, frontier, memo, args.rank,
+                                                   args.max_candidates)
+            except Exception as e:
+                print(f"[WARN] Channel {n} failed: {e}", file=sys.stderr)
+                return {"channel": n, "m3u8": "", "status": "error"}
+
+    results: List[Dict[str, str]] = []
+    try:
+        for fut in asyncio.as_completed([one(n) for n in names]):
+            results.append(await fut)
+    finally:
+        client.close_all()
+    return results, client.summary(), len(fast)
+
+def run_channels_threaded(base: str, names: List[str], args: argparse.Namespace, memo: ValidationMemo,
+                          previous: Dict[str, Dict[str, str]]) -> Tuple[List[Dict[str, str]], str, int]:
+    results: List[Dict[str,str]] = []
+    frontier = CrawlFrontier()
+    fast = []
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool, ThreadPoolExecutor(max_workers=64) as child_pool:
+        def one(n: str) -> Dict[str, str]:
+            if n in previous:
+                kept = recheck_previous(n, previous[n], args.timeout, memo)
+                if kept is not None:
+                    fast.append(n)
+                    return kept
+            return process_channel(base, n, args.timeout, child_pool, frontier, memo, args.rank, args.max_candidates)
+
+        futs = {pool.submit(one, n): n for n in names}
+        for f in as_completed(futs):
+            try:
+                res = f.result()
+            except Exception as e:
+                ch = futs[f]
+                print(f"[WARN] Channel {ch} failed: {e}", file=sys.stderr)
+                res = {"channel": futs[f], "m3u8": "", "status": "error"}
+            results.append(res)
+    return results, HTTP_POOL.summary(), len(fast)
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--base", default=DEFAULT_BASE, help="Base site, e.g. http://172.31.169.169")
     ap.add_argument("--concurrency", type=int, default=30, help="Max concurrent channels")
+    ap.add_argument("--engine", choices=["asyncio", "threads"], default="asyncio", help="Scraping engine")
+    ap.add_argument("--max-requests", type=int, default=64, help="asyncio: max in-flight requests overall")
+    ap.add_argument("--per-host", type=int, default=16, help="asyncio: max in-flight requests per host")
     ap.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout seconds")
     ap.add_argument("--csv", default="m3u8_dump.csv")
     ap.add_argument("--m3u", default="playlist.m3u")
+    ap.add_argument("--rank", action="store_true",
+                    help="Measure every valid candidate (TTFB + segment throughput) and keep the fastest")
+    ap.add_argument("--max-candidates", type=int, default=0,
+                    help="Stop reading a token page (and skip its child pages) once this many m3u8 URLs are found; 0 = no cap")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Re-check each channel's last working URL from --csv first; crawl only channels that fail")
+    ap.add_argument("--validation-cache", default="", help="JSON file to carry validation results across runs")
+    ap.add_argument("--validation-ttl", type=float, default=600.0, help="Seconds a validation result stays valid")
+    ap.add_argument("--http-cache", default="", help="Directory for the on-disk page cache (disabled if empty)")
+    ap.add_argument("--http-cache-mb", type=float, default=64.0, help="Evict least recently used pages above this size")
+    ap.add_argument("--cache-max-age", type=float, default=300.0,
+                    help="Freshness for cached pages that send no ETag/Last-Modified/max-age")
+    ap.add_argument("--host-limit", type=int, default=8, help="Starting concurrent requests per host (adapts up/down)")
+    ap.add_argument("--host-max", type=int, default=32, help="Ceiling for the adaptive per-host limit")
+    ap.add_argument("--no-governor", action="store_true", help="Disable adaptive per-host limits")
+    ap.add_argument("--pool-size", type=int, default=8, help="Idle keep-alive connections kept per host")
+    ap.add_argument("--idle-timeout", type=float, default=30.0, help="Drop pooled connections idle longer than this")
     args = ap.parse_args()
+    HTTP_POOL.max_per_host = args.pool_size
+    HTTP_POOL.idle_timeout = args.idle_timeout
+    GOVERNOR.initial = args.host_limit
+    GOVERNOR.max_limit = max(args.host_limit, args.host_max)
+    GOVERNOR.enabled = not args.no_governor
+    global HTTP_CACHE
+    if args.http_cache:
+        HTTP_CACHE = HTTPCache(args.http_cache, max_bytes=int(args.http_cache_mb * 1024 * 1024),
+                               default_max_age=args.cache_max_age)
 
     homepage = f"{args.base}/"
     status, _, text = http_get(homepage, timeout=args.timeout)
@@ -193,24 +1589,27 @@ def main():
     names = [c.get("ch_name") for c in channels if str(c.get("active")) == "1"]
     print(f"[INFO] Found {len(names)} channels")
 
+    memo = ValidationMemo(ttl=args.validation_ttl)
+    if args.validation_cache:
+        memo.load(args.validation_cache)
+
+    previous = load_previous_results(args.csv) if args.incremental else {}
+    if args.incremental:
+        print(f"[INFO] Incremental: {sum(1 for n in names if n in previous)} channels have a previous working URL")
+
     t0 = time.time()
-    results: List[Dict[str,str]] = []
-    visited: Set[str] = set()
+    if args.engine == "asyncio":
+        results, http_summary, fast_count = asyncio.run(run_channels_async(args.base, names, args, memo, previous))
+    else:
+        results, http_summary, fast_count = run_channels_threaded(args.base, names, args, memo, previous)
 
-    with ThreadPoolExecutor(max_workers=args.concurrency) as pool, ThreadPoolExecutor(max_workers=64) as child_pool:
-        futs = {pool.submit(process_channel, args.base, n, args.timeout, child_pool, visited): n for n in names}
-        for f in as_completed(futs):
-            try:
-                res = f.result()
-            except Exception as e:
-                ch = futs[f]
-                print(f"[WARN] Channel {ch} failed: {e}", file=sys.stderr)
-                res = {"channel": futs[f], "m3u8": "", "status": "error"}
-            results.append(res)
+    if args.validation_cache:
+        memo.save(args.validation_cache)
 
     # Save CSV
     with open(args.csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["channel", "m3u8", "status"])
+        w = csv.DictWriter(f, fieldnames=["channel", "m3u8", "status"] + (RANK_FIELDS if args.rank else []),
+                           extrasaction="ignore")
         w.writeheader()
         w.writerows(results)
 
@@ -228,6 +1627,15 @@ def main():
     print(f"- M3U: {args.m3u}")
     print(f"- Working: {ok_count}/{len(results)}")
     print(f"- Elapsed: {dt:.1f}s with concurrency={args.concurrency}")
+    if args.incremental:
+        print(f"- Fast path: {fast_count}/{len(results)} channels kept their previous URL")
+    print(f"- HTTP ({args.engine}): {http_summary}")
+    print(f"- Validation: {memo.summary()}")
+    if GOVERNOR.enabled:
+        print(f"- Host limits: {GOVERNOR.summary()}")
+    if HTTP_CACHE is not None:
+        print(f"- HTTP cache: {HTTP_CACHE.summary()}")
+    HTTP_POOL.close_all()
 
 if __name__ == "__main__":
     try:
@@ -1,43 +1,161 @@
+import os
+import re
+import json
 import asyncio
+import argparse
 import urllib.parse
+import urllib.request
 from datetime import datetime
 from playwright.async_api import async_playwright
 
 URL = "https://www.distro.tv/live/shemaroo-bollywood/"
 LOG_FILE = "m3u8_changes.log"
 PREVIOUS_LINK_FILE = "previous_link.txt"
+STATE_FILE = "monitor_state.json"
+POOL_SIZE = 4
+CAPTURE_TIMEOUT = 15.0  # upper bound; capture returns as soon as a manifest request is seen
+BLOCKED_RESOURCES = {"image", "font", "media", "stylesheet"}
+STATS_FILE = "resolver_stats.json"
+HTTP_TIMEOUT = 10.0
+MAX_CONFIG_FETCHES = 5
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123 Safari/537.36"
 
-async def get_m3u8():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-
-        m3u8_links = set()
-
-        def handle_request(request):
-            url = request.url
-            if ".m3u8" in url:
-                if "f=" in url:
-                    parsed = urllib.parse.urlparse(url)
-                    params = urllib.parse.parse_qs(parsed.query)
-                    if "f" in params:
-                        decoded = urllib.parse.unquote(params["f"][0])
-                        if ".m3u8" in decoded:
-                            m3u8_links.add(decoded)
-                else:
-                    m3u8_links.add(url)
-
-        context.on("request", handle_request)
-        await page.goto(URL)
-        await page.wait_for_timeout(15000)  # wait for streams to load
-        await browser.close()
-
-        if m3u8_links:
-            link = list(m3u8_links)[0]
-            clean_url = link.split(".m3u8")[0] + ".m3u8"
-            return clean_url
+M3U8_RE = re.compile(r"""https?://[^\s"'<>\\]+?\.m3u8[^\s"'<>\\]*""", re.I)
+CONFIG_URL_RE = re.compile(r"""https?://[^\s"'<>\\]+?(?:/api/|config|feed|\.json)[^\s"'<>\\]*""", re.I)
+NEXT_DATA_RE = re.compile(r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I)
+STATIC_ASSET_RE = re.compile(r'\.(?:js|css|png|jpe?g|gif|svg|webp|woff2?|ico)(?:\?|$)', re.I)
+
+def manifest_from_request(url):
+    """The .m3u8 URL a request points at (unwrapping an f= proxy parameter), or None."""
+    if ".m3u8" not in url:
         return None
+    if "f=" in url:
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        if "f" not in params:
+            return None
+        decoded = urllib.parse.unquote(params["f"][0])
+        return decoded if ".m3u8" in decoded else None
+    return url
+
+def clean_manifest(link):
+    return link.split(".m3u8")[0] + ".m3u8"
+
+# --- Browserless fast path ---
+def fetch_text(url, timeout=HTTP_TIMEOUT):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "*/*"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.read().decode("utf-8", errors="ignore")
+
+def unescape_js(text):
+    return text.replace("\\/", "/").replace("\\u0026", "&").replace("&amp;", "&")
+
+def iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from iter_strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from iter_strings(v)
+
+def next_data_strings(text):
+    m = NEXT_DATA_RE.search(text)
+    if not m:
+        return []
+    try:
+        return list(iter_strings(json.loads(m.group(1))))
+    except ValueError:
+        return []
+
+def find_manifests(text):
+    """Distinct manifest URLs in a page or API body (inline, in __NEXT_DATA__, or behind f=)."""
+    text = unescape_js(text)
+    found = []
+    for candidate in [m.group(0) for m in M3U8_RE.finditer(text)] + next_data_strings(text):
+        link = manifest_from_request(candidate.strip())
+        if link:
+            found.append(clean_manifest(link))
+    return list(dict.fromkeys(found))
+
+def pick_manifest(candidates, page_url):
+    """The single manifest for this page, or None when there is none or it is ambiguous."""
+    if len(candidates) == 1:
+        return candidates[0]
+    key = re.sub(r"[^a-z0-9]", "", page_url.rstrip("/").rsplit("/", 1)[-1].lower())
+    matches = [c for c in candidates if key and key in re.sub(r"[^a-z0-9]", "", c.lower())]
+    return matches[0] if len(matches) == 1 else None
+
+def config_urls(text):
+    text = unescape_js(text)
+    urls = [m.group(0) for m in CONFIG_URL_RE.finditer(text)]
+    urls += [u for u in next_data_strings(text) if u.startswith("http") and CONFIG_URL_RE.fullmatch(u)]
+    urls = [u for u in dict.fromkeys(urls) if not STATIC_ASSET_RE.search(u) and ".m3u8" not in u]
+    return urls[:MAX_CONFIG_FETCHES]
+
+def resolve_without_browser(page_url, timeout=HTTP_TIMEOUT):
+    """Find the page's manifest from its HTML, then from the config/API URLs it references."""
+    try:
+        html = fetch_text(page_url, timeout)
+    except Exception as e:
+        print(f"HTTP fetch of {page_url} failed: {e}")
+        return None
+    link = pick_manifest(find_manifests(html), page_url)
+    if link:
+        return link
+    for api_url in config_urls(html):
+        try:
+            body = fetch_text(api_url, timeout)
+        except Exception:
+            continue
+        link = pick_manifest(find_manifests(body), page_url)
+        if link:
+            return link
+    return None
+
+# --- Playwright capture ---
+async def capture_m3u8(context, page_url, timeout=CAPTURE_TIMEOUT):
+    """Open ``page_url`` in ``context`` and return the first manifest it requests.
+
+    Images, fonts, media and stylesheets are aborted (after checking them for a
+    manifest), so the page only fetches what its player needs.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    found = loop.create_future()
+
+    def note(url):
+        link = manifest_from_request(url)
+        if link and not found.done():
+            found.set_result(link)
+
+    async def handle_route(route):
+        request = route.request
+        note(request.url)
+        if request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    page = await context.new_page()
+    page.on("request", lambda request: note(request.url))
+    await page.route("**/*", handle_route)
+    try:
+        try:
+            await page.goto(page_url, wait_until="commit", timeout=timeout * 1000)
+        except Exception as e:
+            if not found.done():
+                print(f"Navigation to {page_url} failed: {e}")
+        link = await asyncio.wait_for(found, max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        await page.close()
+    return clean_manifest(link)
+
+async def get_m3u8():
+    link, _ = (await resolve_pages([URL], pool_size=1))[URL]
+    return link
 
 def log_message(message):
     """Append log messages to the existing log file without deleting old logs."""
@@ -69,5 +187,112 @@ async def monitor_once():
     else:
         log_message("No link found this cycle.")
 
+def load_state(path=STATE_FILE):
+    """{page_url: last captured link}; seeded from previous_link.txt for the default page."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    try:
+        with open(PREVIOUS_LINK_FILE, "r") as f:
+            previous_link = f.read().strip()
+    except FileNotFoundError:
+        return {}
+    return {URL: previous_link} if previous_link else {}
+
+def save_state(state, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+async def check_page(browser, pool, page_url):
+    """Capture one page in its own isolated context, at most ``pool`` at a time."""
+    async with pool:
+        context = await browser.new_context()
+        try:
+            return await capture_m3u8(context, page_url)
+        except Exception as e:
+            log_message(f"{page_url}: capture failed: {e}")
+            return None
+        finally:
+            await context.close()
+
+def load_stats(path=STATS_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def record_path(stats, page_url, path):
+    entry = stats.setdefault(page_url, {"http": 0, "browser": 0, "none": 0})
+    entry[path] += 1
+    entry["last"] = path
+
+async def resolve_pages(pages, pool_size=POOL_SIZE, stats_file=STATS_FILE):
+    """{page_url: (link, path)}: plain HTTP first, one shared browser only for the pages it missed.
+
+    ``path`` is "http", "browser" or "none"; per-page counts go to ``stats_file``.
+    """
+    pool = asyncio.Semaphore(pool_size)
+
+    async def fast(page_url):
+        async with pool:
+            return await asyncio.to_thread(resolve_without_browser, page_url)
+
+    links = await asyncio.gather(*(fast(page_url) for page_url in pages))
+    results = {page_url: (link, "http" if link else "none") for page_url, link in zip(pages, links)}
+
+    missing = [page_url for page_url in pages if not results[page_url][0]]
+    if missing:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                captured = await asyncio.gather(*(check_page(browser, pool, page_url) for page_url in missing))
+            finally:
+                await browser.close()
+        for page_url, link in zip(missing, captured):
+            if link:
+                results[page_url] = (link, "browser")
+
+    stats = load_stats(stats_file)
+    for page_url in pages:
+        record_path(stats, page_url, results[page_url][1])
+    save_state(stats, stats_file)
+    paths = [path for _, path in results.values()]
+    print(f"Resolved {paths.count('http')} via HTTP, {paths.count('browser')} via browser, "
+          f"{paths.count('none')} not found")
+    return results
+
+async def monitor_pages(pages, pool_size=POOL_SIZE, state_file=STATE_FILE):
+    """Check every page (browser only where plain HTTP fails) and record link changes per page."""
+    state = load_state(state_file)
+    results = await resolve_pages(pages, pool_size)
+
+    for page_url in pages:
+        current_link, _ = results[page_url]
+        previous_link = state.get(page_url)
+        if not current_link:
+            log_message(f"{page_url}: No link found this cycle.")
+            continue
+        if previous_link is None:
+            log_message(f"{page_url}: Initial link: {current_link}")
+        elif current_link != previous_link:
+            log_message(f"{page_url}: Link changed! New link: {current_link}")
+        else:
+            log_message(f"{page_url}: No change in link.")
+        state[page_url] = current_link
+    save_state(state, state_file)
+
 if __name__ == "__main__":
-    asyncio.run(monitor_once())
+    ap = argparse.ArgumentParser(description="Watch distro.tv pages for changes in their .m3u8 link")
+    ap.add_argument("pages", nargs="*", help="Pages to watch (default: the single URL via monitor_once)")
+    ap.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Pages captured concurrently")
+    ap.add_argument("--state", default=STATE_FILE, help="JSON file of the last link per page")
+    args = ap.parse_args()
+    if args.pages:
+        asyncio.run(monitor_pages(args.pages, args.pool_size, args.state))
+    else:
+        asyncio.run(monitor_once())
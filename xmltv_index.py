@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import bisect
+import argparse
+import calendar
+import datetime
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_EPG = "epg_ripper_DUMMY_CHANNEL.xml"
+INDEX_VERSION = 1
+
+# ---------- XMLTV times ----------
+def parse_xmltv_time(value: str) -> int:
+    """'20250910230000 +0000' -> unix seconds (offset optional, UTC if absent)."""
+    stamp, _, offset = value.strip().partition(" ")
+    ts = calendar.timegm(time.strptime(stamp[:14], "%Y%m%d%H%M%S"))
+    if len(offset) == 5 and offset[0] in "+-" and offset[1:].isdigit():
+        minutes = int(offset[1:3]) * 60 + int(offset[3:])
+        ts -= minutes * 60 if offset[0] == "+" else -minutes * 60
+    return ts
+
+def format_xmltv_time(ts: int) -> str:
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y%m%d%H%M%S +0000")
+
+# ---------- Streaming reader ----------
+def iter_xmltv(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield ("channel", {...}) and ("programme", {...}) items one at a time.
+
+    Elements are cleared as soon as they are read, so memory stays flat no
+    matter how many programmes the file holds.
+    """
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end":
+            continue
+        if elem.tag == "channel":
+            icon = elem.find("icon")
+            yield "channel", {
+                "id": elem.get("id", ""),
+                "name": elem.findtext("display-name", ""),
+                "icon": icon.get("src", "") if icon is not None else "",
+            }
+            root.clear()
+        elif elem.tag == "programme":
+            yield "programme", {
+                "channel": elem.get("channel", ""),
+                "start": parse_xmltv_time(elem.get("start", "")),
+                "stop": parse_xmltv_time(elem.get("stop", "")),
+                "title": elem.findtext("title", ""),
+                "desc": elem.findtext("desc", ""),
+            }
+            root.clear()
+
+# ---------- Index ----------
+class XMLTVIndex:
+    """Per-channel programme columns sorted by start time.
+
+    Each channel keeps parallel ``start``/``stop``/``title``/``desc`` lists,
+    so now/next and time-range lookups are a bisect on ``start``.
+    """
+
+    def __init__(self, channels: Dict[str, Dict], programmes: Dict[str, Dict[str, List]], source: Optional[Dict] = None):
+        self.channels = channels
+        self.programmes = programmes
+        self.source = source or {}
+
+    @classmethod
+    def build(cls, path: str) -> "XMLTVIndex":
+        channels: Dict[str, Dict] = {}
+        columns: Dict[str, Dict[str, List]] = {}
+        strings: Dict[str, str] = {}
+        for kind, item in iter_xmltv(path):
+            if kind == "channel":
+                channels[item.pop("id")] = item
+                continue
+            col = columns.setdefault(item["channel"], {"start": [], "stop": [], "title": [], "desc": []})
+            col["start"].append(item["start"])
+            col["stop"].append(item["stop"])
+            # Placeholder guides repeat the same strings thousands of times; keep one copy of each
+            col["title"].append(strings.setdefault(item["title"], item["title"]))
+            col["desc"].append(strings.setdefault(item["desc"], item["desc"]))
+
+        for col in columns.values():
+            if any(a > b for a, b in zip(col["start"], col["start"][1:])):
+                order = sorted(range(len(col["start"])), key=col["start"].__getitem__)
+                for key in col:
+                    col[key] = [col[key][i] for i in order]
+        return cls(channels, columns, source_stamp(path))
+
+    def save(self, path: str):
+        data = {"version": INDEX_VERSION, "source": self.source, "channels": self.channels,
+                "programmes": self.programmes}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["XMLTVIndex"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring EPG index {path}: {e}", file=sys.stderr)
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data["channels"], data["programmes"], data.get("source"))
+
+    def _programme(self, col: Dict[str, List], i: int) -> Dict:
+        return {"start": col["start"][i], "stop": col["stop"][i], "title": col["title"][i], "desc": col["desc"][i]}
+
+    def now_next(self, channel: str, ts: Optional[float] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """(programme airing at ``ts``, the one after it); either may be None."""
+        col = self.programmes.get(channel)
+        if not col:
+            return None, None
+        ts = ts if ts is not None else time.time()
+        i = bisect.bisect_right(col["start"], ts)
+        current = self._programme(col, i - 1) if i and col["stop"][i - 1] > ts else None
+        upcoming = self._programme(col, i) if i < len(col["start"]) else None
+        return current, upcoming
+
+    def between(self, channel: str, start: float, stop: float) -> List[Dict]:
+        """Programmes overlapping [start, stop)."""
+        col = self.programmes.get(channel)
+        if not col:
+            return []
+        lo = bisect.bisect_right(col["start"], start)
+        if lo and col["stop"][lo - 1] > start:
+            lo -= 1
+        hi = bisect.bisect_left(col["start"], stop, lo)
+        return [self._programme(col, i) for i in range(lo, hi)]
+
+    def summary(self) -> str:
+        total = sum(len(c["start"]) for c in self.programmes.values())
+        return f"{len(self.channels)} channels, {total} programmes"
+
+def source_stamp(path: str) -> Dict:
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def open_index(xml_path: str, index_path: Optional[str] = None) -> XMLTVIndex:
+    """Load the persisted index if it still matches the XML file, else rebuild and save it."""
+    index_path = index_path or xml_path + ".idx.json"
+    index = XMLTVIndex.load(index_path)
+    if index is not None:
+        stamp = source_stamp(xml_path)
+        if (index.source.get("mtime_ns"), index.source.get("size")) == (stamp["mtime_ns"], stamp["size"]):
+            return index
+    index = XMLTVIndex.build(xml_path)
+    index.save(index_path)
+    return index
+
+def describe(prog: Optional[Dict]) -> str:
+    if prog is None:
+        return "-"
+    return f"{format_xmltv_time(prog['start'])} -> {format_xmltv_time(prog['stop'])}  {prog['title']}"
+
+def main():
+    ap = argparse.ArgumentParser(description="Indexed now/next and time-range lookups on an XMLTV guide")
+    ap.add_argument("epg", nargs="?", default=DEFAULT_EPG, help="XMLTV file")
+    ap.add_argument("--index", default="", help="Index file (default: <epg>.idx.json)")
+    ap.add_argument("--channel", action="append", default=[], help="Channel id to query (repeatable; default all)")
+    ap.add_argument("--at", default="", help="Query time as YYYYMMDDHHMMSS (UTC); default now")
+    ap.add_argument("--hours", type=float, default=0.0, help="List programmes from --at for this many hours")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    index = open_index(args.epg, args.index or None)
+    print(f"[INFO] {index.summary()} ready in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    at = parse_xmltv_time(args.at) if args.at else time.time()
+    for channel in args.channel or sorted(index.programmes):
+        if args.hours:
+            print(f"{channel}:")
+            for prog in index.between(channel, at, at + args.hours * 3600):
+                print(f"   {describe(prog)}")
+        else:
+            current, upcoming = index.now_next(channel, at)
+            print(f"{channel}: now {describe(current)} | next {describe(upcoming)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+import yt_dlp
+from yt_dlp.cookies import load_cookies
+
+logger = logging.getLogger("yt_logger")
+
+# --- Shared cookie state ---
+_cookie_jars = {}
+_cookie_lock = threading.Lock()
+
+def shared_cookiejar(cookies_file_path):
+    """Parse cookies.txt once per process and hand the same jar to every session."""
+    with _cookie_lock:
+        jar = _cookie_jars.get(cookies_file_path)
+        if jar is None:
+            jar = _cookie_jars[cookies_file_path] = load_cookies(cookies_file_path, None, None)
+        return jar
+
+# --- Session pool ---
+class SessionPool:
+    """A small pool of pre-built ``YoutubeDL`` instances.
+
+    A YoutubeDL is not safe to share between threads, so each one is checked
+    out by a single thread for the duration of an extraction and handed back
+    afterwards. Instances are built lazily up to ``size`` and then reused,
+    which avoids re-parsing cookies and re-initialising extractors and HTTP
+    handlers on every call.
+    """
+
+    def __init__(self, name, build_opts, size=4, cookies_file_path=None):
+        self.name = name
+        self.build_opts = build_opts
+        self.size = size
+        self.cookies_file_path = cookies_file_path
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.built = 0
+        self.build_seconds = 0.0
+        self.checkouts = 0
+        self.all = []
+
+    def _build(self):
+        t0 = time.perf_counter()
+        ydl = yt_dlp.YoutubeDL(self.build_opts())
+        if self.cookies_file_path:
+            # Newer yt_dlp loads cookies lazily; assigning first skips the per-instance parse
+            ydl.cookiejar = shared_cookiejar(self.cookies_file_path)
+        elapsed = time.perf_counter() - t0
+        with self.lock:
+            self.build_seconds += elapsed
+            self.all.append(ydl)
+        return ydl
+
+    @contextmanager
+    def session(self):
+        try:
+            ydl = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_build = self.built < self.size
+                if can_build:
+                    self.built += 1
+            ydl = self._build() if can_build else self.idle.get()
+
+        with self.lock:
+            self.checkouts += 1
+        try:
+            yield ydl
+        finally:
+            self.idle.put(ydl)
+
+    def stats(self):
+        with self.lock:
+            built, checkouts, build_seconds = len(self.all), self.checkouts, self.build_seconds
+        avg = build_seconds / built if built else 0.0
+        return {
+            'pool': self.name,
+            'built': built,
+            'checkouts': checkouts,
+            'avg_build_ms': round(avg * 1000, 1),
+            'saved_ms': round(avg * max(0, checkouts - built) * 1000, 1),
+        }
+
+    def close(self):
+        with self.lock:
+            sessions, self.all = self.all, []
+        for ydl in sessions:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.debug(f"Closing {self.name} session failed: {e}")
+
+def log_session_stats(*pools):
+    for pool in pools:
+        s = pool.stats()
+        logger.info(
+            f"yt_dlp {s['pool']} sessions: built {s['built']} for {s['checkouts']} extractions "
+            f"(avg build {s['avg_build_ms']}ms, ~{s['saved_ms']}ms construction saved)"
+        )